@@ -0,0 +1,18 @@
+import pandas as pd
+
+# Datasets read by waterfall_dashboard.py on startup
+datasets = [
+    "apl8_auction_guide.csv",
+    "apl8_auction_top_picks.csv",
+    "apl_master_data.csv"
+]
+
+# Convert each CSV once to Feather, which the dashboard loads instead when present
+for input_file in datasets:
+    output_file = input_file.replace(".csv", ".feather")
+    
+    print(f"Loading data from {input_file}...")
+    df = pd.read_csv(input_file)
+    
+    df.to_feather(output_file)
+    print(f"Data exported to {output_file} ({df.shape[0]} rows, {df.shape[1]} columns)")
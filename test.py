@@ -0,0 +1,45 @@
+import pandas as pd
+
+from waterfall_dashboard import (
+    load_data, get_affordable, recommend_team, pick_within_budget,
+    TOTAL_BUDGET, TEAM_SIZE, MIN_NON_CIS, NON_CIS_GENDER
+)
+
+
+# Optimal Fill should build a full team from the shipped guide that meets the non-cis requirement
+def test_recommend_team_fills_team_from_guide():
+    auction_guide, _, _ = load_data()
+    candidates = get_affordable(auction_guide, id(auction_guide), TOTAL_BUDGET, frozenset())
+
+    team = recommend_team(candidates, TOTAL_BUDGET, TEAM_SIZE, MIN_NON_CIS)
+
+    assert len(team) == TEAM_SIZE
+    assert team['Price'].sum() <= TOTAL_BUDGET
+    assert (team['Gender'] == NON_CIS_GENDER).sum() >= MIN_NON_CIS
+
+
+# Value-ordered players for the pick_within_budget tests
+def ranked_players(prices):
+    return pd.DataFrame({
+        'Player': [f"Player {i}" for i in range(len(prices))],
+        'Price': prices
+    })
+
+
+def test_pick_within_budget_total_stays_within_budget():
+    picked = pick_within_budget(ranked_players([6.0, 5.0, 4.0, 3.0]), 10.0, 3)
+
+    assert picked['Price'].sum() <= 10.0
+
+
+def test_pick_within_budget_skips_player_that_does_not_fit():
+    picked = pick_within_budget(ranked_players([6.0, 5.0, 4.0]), 10.0, 2)
+
+    assert "Player 1" not in picked['Player'].tolist()
+
+
+def test_pick_within_budget_cheaper_player_further_down_fills_slot():
+    picked = pick_within_budget(ranked_players([6.0, 5.0, 4.0]), 10.0, 2)
+
+    assert picked['Player'].tolist() == ["Player 0", "Player 2"]
+    assert picked['Price'].sum() == 10.0
@@ -7,6 +7,10 @@ from PIL import Image
 import os
 import math
 from datetime import datetime
+from functools import lru_cache
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from scipy.optimize import milp, LinearConstraint, Bounds
 
 # Set page config with wide layout and a custom title
 st.set_page_config(
@@ -133,15 +137,60 @@ st.markdown("""
 TOTAL_BUDGET = 150  # million
 TEAM_SIZE = 10
 MIN_NON_CIS = 2
+TEAM_COLUMNS = ['Player', 'Tier', 'Price', 'Gender', 'Position', 'Value_Score', 'Bid', 'Final_Price']
 
-# Function to load data
-@st.cache_data
+# Chart colors
+TIER_COLORS = {1: '#FF9800', 2: '#2196F3', 3: '#4CAF50', 4: '#9C27B0'}
+TIER_LABEL_COLORS = {f'Tier {tier}': color for tier, color in TIER_COLORS.items()}
+# Gender labels as they appear in the data files
+MAN_GENDER = 'Man'
+NON_CIS_GENDER = 'Non-Cis'
+
+GENDER_COLORS = {MAN_GENDER: '#2196F3', NON_CIS_GENDER: '#E91E63'}
+POSITION_GROUP_COLORS = {'Forwards': '#FF5722', 'Midfielders': '#2196F3', 'Defenders': '#4CAF50', 'Goalkeepers': '#9C27B0'}
+
+# Value tiers by Value_Score: Poor < 1.0 <= Fair < 1.5 <= Good < 2.0 <= Excellent
+VALUE_TIER_BINS = [-np.inf, 1.0, 1.5, 2.0, np.inf]
+VALUE_TIER_LABELS = ['Poor', 'Fair', 'Good', 'Excellent']
+
+# Budget fit by share of the remaining budget: Squad <= 10% < Core <= 40% < Stretch
+BUDGET_FIT_SHARES = [0.1, 0.4]
+BUDGET_FIT_LABELS = ['Squad', 'Core', 'Stretch']
+
+# Max bid strategy: high priority players can go to high_priority_base times the per-slot
+# average plus a weighted share of their value above 1.0, other players to the average plus
+# a smaller share. Passed to the max bid functions so it is part of their cache keys
+@dataclass(frozen=True, slots=True)
+class BidStrategy:
+    high_priority_base: float = 1.5
+    high_priority_value_weight: float = 0.5
+    value_weight: float = 0.3
+
+BID_STRATEGY = BidStrategy()
+
+# Smallest bid the bid modal allows, in millions
+MIN_BID = 0.5
+
+# Seconds between the Optimal Fill tab's checks for a finished background solve
+OPTIMAL_FILL_POLL = 1.0
+
+# Function to read a dataset, preferring the Feather copy written by export_feather_data.py
+# since it skips CSV parsing and dtype inference
+def read_dataset(csv_file):
+    feather_file = csv_file.replace(".csv", ".feather")
+    if os.path.exists(feather_file):
+        return pd.read_feather(feather_file)
+    return pd.read_csv(csv_file)
+
+# Function to load data - the datasets are static reference data, so one shared
+# read-only copy is kept instead of hashing and copying them on every access
+@st.cache_resource
 def load_data():
     try:
         # Load all relevant datasets
-        auction_guide = pd.read_csv("apl8_auction_guide.csv")
-        top_picks = pd.read_csv("apl8_auction_top_picks.csv")
-        master_data = pd.read_csv("apl_master_data.csv")
+        auction_guide = read_dataset("apl8_auction_guide.csv")
+        top_picks = read_dataset("apl8_auction_top_picks.csv")
+        master_data = read_dataset("apl_master_data.csv")
         
         # Debug info
         print(f"Loaded data: auction_guide={auction_guide.shape}, top_picks={top_picks.shape}, master_data={master_data.shape}")
@@ -162,47 +211,312 @@ def load_data():
             for col in missing_cols:
                 auction_guide[col] = None
         
+        # Fill defaults and fix numeric dtypes once here, so handlers can use row values as-is.
+        # Prices are whole or half millions, so float32 holds them exactly at half the size
+        auction_guide = auction_guide.fillna({
+            'Price': 0,
+            'Tier': 4,
+            'Gender': 'Not specified',
+            'Primary_Position': 'Not specified',
+            'Value_Score': 1.0
+        }).astype({
+            'Price': 'float32', 'Value_Score': 'float32', 'Recommended': 'float32',
+            'Historical_Avg': 'float32', 'Tier': 'int8'
+        })
+        
+        # Top picks prices feed the remaining budget too, so keep them float64 as well;
+        # the other top picks numerics are display and sort values only
+        if 'Price' in top_picks.columns:
+            top_picks['Price'] = top_picks['Price'].astype('float64')
+        for col in ['Value_Score', 'Auction_Score', 'Recommended', 'Historical_Avg']:
+            if col in top_picks.columns:
+                top_picks[col] = pd.to_numeric(top_picks[col], errors='coerce').astype('float32')
+        if 'Tier' in top_picks.columns:
+            top_picks['Tier'] = top_picks['Tier'].astype('int8')
+        
+        # Store low-cardinality columns as categoricals for faster comparisons and grouping
+        for col in ['Gender', 'Primary_Position', 'Secondary_Position', 'Auction_Priority']:
+            if col in auction_guide.columns:
+                auction_guide[col] = auction_guide[col].astype('category')
+        
+        # Bucket value scores once, so value filters compare ordered category codes
+        auction_guide['Value_Tier'] = pd.cut(
+            auction_guide['Value_Score'], bins=VALUE_TIER_BINS, labels=VALUE_TIER_LABELS, right=False
+        )
+        for col in ['Gender', 'Primary_Position', 'Position_Group']:
+            if col in top_picks.columns:
+                top_picks[col] = top_picks[col].astype('category')
+        auction_guide['Tier'] = pd.Categorical(
+            auction_guide['Tier'],
+            categories=sorted(auction_guide['Tier'].dropna().unique()),
+            ordered=True
+        )
+        
+        # Give each player a small integer id for widget keys
+        auction_guide['pid'] = np.arange(len(auction_guide), dtype='int32')
+        top_picks['pid'] = np.arange(len(top_picks), dtype='int32')
+        
         return auction_guide, top_picks, master_data
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         # Return empty dataframes to avoid errors
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
-# Function to get value class
-def get_value_class(value_score):
-    if value_score >= 2.0:
-        return "excellent-value"
-    elif value_score >= 1.5:
-        return "good-value"
-    elif value_score >= 1.0:
-        return "fair-value"
-    else:
-        return "poor-value"
+# Function to get value class from a player's precomputed Value_Tier
+def get_value_class(value_tier):
+    return f"{value_tier.lower()}-value"
 
-# Function to get max bid
-def calculate_max_bid(remaining_budget, players_needed, player_value, is_high_priority):
+# Function to get max bid, memoized since every visible card and an open bid modal
+# ask again with the same inputs on each rerun
+@lru_cache(maxsize=1024)
+def calculate_max_bid(remaining_budget, players_needed, player_value, is_high_priority, strategy):
     # Base calculation based on even distribution
     avg_per_player = remaining_budget / players_needed if players_needed > 0 else 0
     
     # Adjust based on value and priority
     if is_high_priority:
         # High priority players can get up to 1.5-2x the average
-        max_bid = avg_per_player * (1.5 + (player_value - 1) * 0.5)
+        max_bid = avg_per_player * (strategy.high_priority_base + (player_value - 1) * strategy.high_priority_value_weight)
     else:
         # Other players shouldn't go much above average
-        max_bid = avg_per_player * (1 + (player_value - 1) * 0.3)
+        max_bid = avg_per_player * (1 + (player_value - 1) * strategy.value_weight)
     
     # Cap at remaining budget
     return min(max_bid, remaining_budget)
 
+# Function to get the max bid for every player in the guide at once, the same calculation
+# as calculate_max_bid vectorized and cached until the budget or team size changes
+@st.cache_data(ttl=600)
+def compute_max_bids(_auction_guide, guide_id, remaining_budget, players_needed, strategy):
+    avg_per_player = remaining_budget / players_needed if players_needed > 0 else 0
+    player_value = _auction_guide['Value_Score'].to_numpy(dtype=float)
+    is_high_priority = (_auction_guide['Auction_Priority'] == "High").fillna(False).to_numpy(dtype=bool)
+    
+    max_bids = np.where(
+        is_high_priority,
+        avg_per_player * (strategy.high_priority_base + (player_value - 1) * strategy.high_priority_value_weight),
+        avg_per_player * (1 + (player_value - 1) * strategy.value_weight)
+    )
+    return pd.Series(np.minimum(max_bids, remaining_budget), index=_auction_guide.index)
+
+# Function to build the team DataFrame column by column, cached until the team changes
+@st.cache_data
+def build_team_df(team_columns):
+    team_df = pd.DataFrame(dict(zip(TEAM_COLUMNS, team_columns)), columns=TEAM_COLUMNS)
+    return team_df.astype({
+        'Tier': 'category', 'Gender': 'category', 'Position': 'category',
+        'Price': 'float32', 'Value_Score': 'float32', 'Bid': 'float32', 'Final_Price': 'float32'
+    })
+
+# Function to get the current team as hashable per-column values for cache keys
+def get_team_columns():
+    players = st.session_state.team_players_by_name.values()
+    return tuple(tuple(p.get(col) for p in players) for col in TEAM_COLUMNS)
+
+# Function to get the current team as a DataFrame
+def get_team_df():
+    return build_team_df(get_team_columns())
+
+# Function to build the team composition charts, cached until the team changes
+@st.cache_data
+def build_team_charts(team_columns):
+    team_df = build_team_df(team_columns)
+    
+    # Tier distribution pie chart
+    tier_counts = team_df['Tier'].value_counts()
+    
+    tier_fig = px.pie(
+        values=tier_counts.values, 
+        names=tier_counts.index, 
+        title='Players by Tier',
+        color=tier_counts.index,
+        color_discrete_map=TIER_COLORS
+    )
+    tier_fig.update_traces(textinfo='percent+label')
+    tier_fig.update_layout(height=250)
+    
+    # Budget allocation by position, using actual price paid (final price or regular price)
+    team_df['Actual_Price'] = team_df['Final_Price'].fillna(team_df['Price'])
+    position_budget = team_df.groupby('Position', observed=True)['Actual_Price'].sum().reset_index()
+    position_budget = position_budget.sort_values('Actual_Price', ascending=False)
+    
+    position_fig = px.bar(
+        position_budget,
+        x='Position',
+        y='Actual_Price',
+        title='Budget by Position (₹M)',
+        color='Position',
+    )
+    position_fig.update_layout(height=250)
+    
+    # Gender distribution
+    gender_counts = team_df['Gender'].value_counts()
+    
+    gender_fig = px.bar(
+        x=gender_counts.index,
+        y=gender_counts.values,
+        labels={'x': 'Gender', 'y': 'Count', 'color': 'Gender'},
+        title='Gender Distribution',
+        color=gender_counts.index,
+        color_discrete_map=GENDER_COLORS
+    )
+    gender_fig.update_layout(height=250)
+    
+    return tier_fig, position_fig, gender_fig
+
+# Function to get available players within budget, cached per team and sold state
+# (the guide itself is not hashed; guide_id identifies the shared loaded copy)
+@st.cache_data(ttl=600)
+def get_affordable(_auction_guide, guide_id, budget, excluded, gender=None):
+    eligible_mask = ~_auction_guide['Player'].isin(excluded)
+    mask = eligible_mask & (_auction_guide['Price'] <= budget)
+    if gender is not None:
+        mask &= _auction_guide['Gender'] == gender
+    return _auction_guide[mask].sort_values('Value_Score', ascending=False)
+
+# Function to apply the player search filters to the guide
+def filter_players(auction_guide, filters, sold_players):
+    # Ensure required columns exist for filtering; the filters below return new frames,
+    # so the guide itself is only copied when a column has to be added
+    required_columns = ['Player', 'Gender', 'Tier', 'Price', 'Value_Score', 'Primary_Position']
+    missing_columns = [col for col in required_columns if col not in auction_guide.columns]
+    filtered_players = auction_guide.assign(**dict.fromkeys(missing_columns)) if missing_columns else auction_guide
+    
+    # Apply text search filter
+    if filters["search_query"] != "":
+        if 'Player' in filtered_players.columns:
+            # Make search more flexible by allowing partial matches
+            filtered_players = filtered_players[filtered_players["Player"].str.contains(
+                filters["search_query"], case=False, na=False)]
+    
+    # Build the tier, gender, value, price, availability and top-picks filters into a
+    # single query so the guide is swept once rather than once per filter
+    tier_filter = filters["tier"]
+    gender_filter = filters["gender"]
+    price_min = filters["price_min"]
+    price_max = filters["price_max"]
+    
+    # Include players with no price data (Price != Price is true for NA)
+    query_parts = ["(@price_min <= Price <= @price_max or Price != Price)"]
+    
+    if tier_filter != "All":
+        query_parts.append("Tier == @tier_filter")
+    
+    if gender_filter != "All":
+        query_parts.append("Gender == @gender_filter")
+    
+    if filters["value"] != "All" and 'Value_Tier' in filtered_players.columns:
+        # Filter options are named after their lowest tier, e.g. "Good (>=1.5)"
+        min_tier = filters["value"].split(" ")[0]
+        if min_tier == "Poor":
+            query_parts.append("Value_Tier == 'Poor'")
+        else:
+            query_parts.append("Value_Tier >= @min_tier")
+    
+    if filters["availability"] == "Available Only":
+        query_parts.append("Player not in @sold_players")
+    elif filters["availability"] == "Sold Players Only":
+        query_parts.append("Player in @sold_players")
+    
+    if filters["top_picks_only"] and 'Auction_Priority' in filtered_players.columns:
+        query_parts.append("Auction_Priority == 'High'")
+    
+    filtered_players = filtered_players.query(" and ".join(query_parts))
+    
+    # Apply position filter with more lenient matching
+    if filters["position"] != "All":
+        filtered_players = filtered_players[filtered_players["Primary_Position"].str.contains(
+            filters["position"], case=False, na=False)]
+    
+    return filtered_players
+
+# Function to get guide row labels for each tier ordered by Value_Score (best first),
+# so top-N lookups within a tier are a slice instead of a sort
+@st.cache_data
+def get_tier_value_order(_auction_guide, guide_id):
+    ranked = _auction_guide.sort_values('Value_Score', ascending=False, kind='stable')
+    return {tier: ranked.index[ranked['Tier'] == tier].to_numpy() for tier in ranked['Tier'].unique()}
+
+# Function to take up to count players from a value-ordered frame, accepting each one only
+# if the running total still fits the budget (players that don't fit are skipped)
+def pick_within_budget(ranked, budget, count):
+    picked = []
+    allocated = 0.0
+    for pos, price in enumerate(ranked['Price'].to_numpy()):
+        if len(picked) == count:
+            break
+        if allocated + price <= budget:
+            allocated += price
+            picked.append(pos)
+    return ranked.iloc[picked]
+
+# Function to get the top picks for each category tab, ordered by Auction_Score once
+@st.cache_data
+def get_top_picks_by_category(_top_picks, picks_id):
+    if "Auction_Score" in _top_picks.columns:
+        _top_picks = _top_picks.sort_values("Auction_Score", ascending=False, kind='stable')
+    return {
+        "All Players": _top_picks,
+        "Tier 1": _top_picks[_top_picks["Tier"] == 1],
+        "Tier 2": _top_picks[_top_picks["Tier"] == 2],
+        "Tier 3": _top_picks[_top_picks["Tier"] == 3],
+        "Tier 4": _top_picks[_top_picks["Tier"] == 4],
+        "Best Value": _top_picks[_top_picks["Selection_Reason"].str.contains("value", case=False, na=False)]
+    }
+
+# Function to get each top pick's budget fit against the remaining budget, recomputed only when the budget changes
+@st.cache_data
+def get_budget_fit(_top_picks, picks_id, remaining_budget):
+    prices = _top_picks['Price'].to_numpy()
+    codes = np.select([prices <= remaining_budget * share for share in BUDGET_FIT_SHARES],
+                      range(len(BUDGET_FIT_SHARES)), len(BUDGET_FIT_SHARES))
+    return pd.Series(pd.Categorical.from_codes(codes, BUDGET_FIT_LABELS, ordered=True), index=_top_picks.index)
+
+# Function to get the worker thread shared by all sessions for background team recommendations
+@st.cache_resource
+def get_recommend_pool():
+    return ThreadPoolExecutor(max_workers=1)
+
+# Function to pick the highest total value set of candidates that fills the remaining slots
+# within budget and meets the non-cis requirement, solved as a 0/1 knapsack with MILP.
+# Runs on the recommend pool, so it must not call Streamlit
+def recommend_team(candidates, budget, slots, non_cis_needed):
+    if slots <= 0 or len(candidates) < slots:
+        return candidates.iloc[0:0]
+    
+    prices = candidates['Price'].to_numpy(dtype=float)
+    is_non_cis = (candidates['Gender'] == NON_CIS_GENDER).to_numpy(dtype=float)
+    constraints = [
+        LinearConstraint(prices, ub=budget),
+        LinearConstraint(np.ones(len(candidates)), lb=slots, ub=slots),
+        LinearConstraint(is_non_cis, lb=non_cis_needed)
+    ]
+    result = milp(
+        -candidates['Value_Score'].to_numpy(dtype=float),
+        constraints=constraints,
+        integrality=np.ones(len(candidates)),
+        bounds=Bounds(0, 1)
+    )
+    
+    # No combination fits the budget and requirements
+    if result.x is None:
+        return candidates.iloc[0:0]
+    return candidates[result.x > 0.5]
+
 # Function to display header
 def show_header():
     # Dashboard title only - no logo
     st.markdown('<div class="header"><h1>WATERFALL FC Auction Dashboard</h1></div>', unsafe_allow_html=True)
     
-    # Dashboard navigation
-    tabs = st.tabs(["Team Builder", "Player Search", "Top Targets", "Auction Simulation", "Info"])
-    return tabs
+    # Dashboard navigation - a radio rather than st.tabs, so only the selected tab is rendered
+    active_tab = st.radio(
+        "Navigation",
+        ["Team Builder", "Player Search", "Top Targets", "Auction Simulation", "Info"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="active_tab"
+    )
+    return active_tab
 
 # Function to display budget
 def show_budget(remaining_budget, players_needed):
@@ -222,10 +536,17 @@ def show_budget(remaining_budget, players_needed):
 
 # Function to initialize session state
 def init_session_state():
-    if 'team_players' not in st.session_state:
-        st.session_state.team_players = []
+    if 'team_players_by_name' not in st.session_state:
+        st.session_state.team_players_by_name = {}  # Format: {player_name: player_dict}, in order added
     if 'remaining_budget' not in st.session_state:
         st.session_state.remaining_budget = TOTAL_BUDGET
+    # Team aggregates, kept in step by add_team_player/remove_team_player instead of recomputed
+    if 'spent' not in st.session_state:
+        st.session_state.spent = 0.0
+    if 'players_needed' not in st.session_state:
+        st.session_state.players_needed = TEAM_SIZE
+    if 'position_counts' not in st.session_state:
+        st.session_state.position_counts = {}  # Format: {position: player_count}
     if 'sold_players' not in st.session_state:
         st.session_state.sold_players = []
     if 'search_query' not in st.session_state:
@@ -258,6 +579,83 @@ def init_session_state():
     if 'bid_amount' not in st.session_state:
         st.session_state.bid_amount = 0.0
 
+# Function to add a guide or top picks player to the team, paying final_price if given
+# (a bid) or the listed price, and updating the team aggregates to match
+def add_team_player(player_name, player, bid=None, final_price=None):
+    # Get values for required fields; missing ones are filled at load
+    player_price = float(player['Price'])
+    cost = player_price if final_price is None else final_price
+    position = player['Primary_Position']
+    
+    st.session_state.team_players_by_name[player_name] = {
+        'Player': player_name,
+        'Tier': int(player['Tier']),
+        'Price': player_price,
+        'Gender': player['Gender'],
+        'Position': position,
+        'Value_Score': float(player['Value_Score']),
+        'Bid': bid,
+        'Final_Price': cost
+    }
+    st.session_state.remaining_budget -= cost
+    st.session_state.spent += cost
+    st.session_state.players_needed -= 1
+    st.session_state.position_counts[position] = st.session_state.position_counts.get(position, 0) + 1
+
+# Function to remove a player from the team and refund what was paid
+def remove_team_player(player_name):
+    team_player = st.session_state.team_players_by_name.pop(player_name)
+    cost = team_player['Final_Price']
+    
+    st.session_state.remaining_budget += cost
+    st.session_state.spent -= cost
+    st.session_state.players_needed += 1
+    st.session_state.position_counts[team_player['Position']] -= 1
+
+# Function to empty the team and restore the full budget
+def reset_team():
+    st.session_state.team_players_by_name = {}
+    st.session_state.remaining_budget = TOTAL_BUDGET
+    st.session_state.spent = 0.0
+    st.session_state.players_needed = TEAM_SIZE
+    st.session_state.position_counts = {}
+
+# Callback to add a player to the team; runs before the rerun triggered by the click
+def add_to_team(player_name, player):
+    # Check if we can afford the player
+    if float(player['Price']) <= st.session_state.remaining_budget:
+        add_team_player(player_name, player)
+
+# Callback to open the bid modal for a player
+def start_bid(player_name):
+    st.session_state.current_bid_player = player_name
+
+# Callback to close the bid modal without bidding
+def cancel_bid():
+    st.session_state.current_bid_player = None
+
+# Callback to confirm a bid from the bid modal; the team, budget and bid history are all
+# updated together before the rerun triggered by the click
+def confirm_bid(player_name, player):
+    bid_amount = st.session_state[f"bid_amount_{player['pid']}"]
+    final_price = st.session_state[f"final_price_{player['pid']}"]
+    
+    # Check if we can afford the player
+    if final_price <= st.session_state.remaining_budget:
+        # Add to team with bid information, paying the final price
+        add_team_player(player_name, player, bid=bid_amount, final_price=final_price)
+        # Add to bid history
+        st.session_state.bid_history[player_name] = {
+            'bid': bid_amount,
+            'final_price': final_price
+        }
+        # Clear current bid player
+        st.session_state.current_bid_player = None
+
+# Callback to mark a player as sold to another team
+def mark_sold(player_name):
+    st.session_state.sold_players.append(player_name)
+
 # Function to display simulation screen
 def show_simulation_tab(auction_guide, tab):
     with tab:
@@ -296,12 +694,7 @@ def show_simulation_tab(auction_guide, tab):
                     y='Budget',
                     title=f"Budget Distribution (₹{total_sim_budget}M)",
                     color='Tier',
-                    color_discrete_map={
-                        'Tier 1': '#FF9800',
-                        'Tier 2': '#2196F3',
-                        'Tier 3': '#4CAF50',
-                        'Tier 4': '#9C27B0'
-                    }
+                    color_discrete_map=TIER_LABEL_COLORS
                 )
                 fig.update_layout(height=250)
                 st.plotly_chart(fig, use_container_width=True)
@@ -339,12 +732,7 @@ def show_simulation_tab(auction_guide, tab):
                     names='Tier',
                     title="Players by Tier",
                     color='Tier',
-                    color_discrete_map={
-                        'Tier 1': '#FF9800',
-                        'Tier 2': '#2196F3',
-                        'Tier 3': '#4CAF50',
-                        'Tier 4': '#9C27B0'
-                    }
+                    color_discrete_map=TIER_LABEL_COLORS
                 )
                 count_fig.update_layout(height=250)
                 st.plotly_chart(count_fig, use_container_width=True)
@@ -378,12 +766,7 @@ def show_simulation_tab(auction_guide, tab):
                     names='Position',
                     title=f"Budget Distribution (₹{total_sim_budget}M)",
                     color='Position',
-                    color_discrete_map={
-                        'Forwards': '#FF5722',
-                        'Midfielders': '#2196F3',
-                        'Defenders': '#4CAF50',
-                        'Goalkeepers': '#9C27B0'
-                    }
+                    color_discrete_map=POSITION_GROUP_COLORS
                 )
                 fig.update_layout(height=250)
                 st.plotly_chart(fig, use_container_width=True)
@@ -407,12 +790,7 @@ def show_simulation_tab(auction_guide, tab):
                     y='Count',
                     title="Players by Position",
                     color='Position',
-                    color_discrete_map={
-                        'Forwards': '#FF5722',
-                        'Midfielders': '#2196F3',
-                        'Defenders': '#4CAF50',
-                        'Goalkeepers': '#9C27B0'
-                    }
+                    color_discrete_map=POSITION_GROUP_COLORS
                 )
                 count_fig.update_layout(height=250)
                 st.plotly_chart(count_fig, use_container_width=True)
@@ -433,41 +811,31 @@ def show_simulation_tab(auction_guide, tab):
                 simulated_team = pd.DataFrame()
                 
                 if sim_by == "Tier":
-                    # Get best players from each tier
-                    t1_players = auction_guide[
-                        (auction_guide['Tier'] == 1) & 
-                        (auction_guide['Price'] <= t1_budget) &
-                        (~auction_guide['Player'].isin(st.session_state.sold_players))
-                    ].sort_values(['Value_Score'], ascending=[False]).head(t1_count)
-                    
-                    t2_players = auction_guide[
-                        (auction_guide['Tier'] == 2) & 
-                        (auction_guide['Price'] <= t2_budget) &
-                        (~auction_guide['Player'].isin(st.session_state.sold_players))
-                    ].sort_values(['Value_Score'], ascending=[False]).head(t2_count)
+                    tier_order = get_tier_value_order(auction_guide, id(auction_guide))
                     
-                    t3_players = auction_guide[
-                        (auction_guide['Tier'] == 3) & 
-                        (auction_guide['Price'] <= t3_budget) &
-                        (~auction_guide['Player'].isin(st.session_state.sold_players))
-                    ].sort_values(['Value_Score'], ascending=[False]).head(t3_count)
+                    # Helper function to get the best players from a tier, already in value order,
+                    # keeping the tier's combined price within its budget
+                    def get_tier_players(tier, budget, count):
+                        ranked = auction_guide.loc[tier_order.get(tier, [])]
+                        available = ranked[~ranked['Player'].isin(st.session_state.sold_players)]
+                        return pick_within_budget(available, budget, count)
                     
-                    t4_players = auction_guide[
-                        (auction_guide['Tier'] == 4) & 
-                        (auction_guide['Price'] <= t4_budget) &
-                        (~auction_guide['Player'].isin(st.session_state.sold_players))
-                    ].sort_values(['Value_Score'], ascending=[False]).head(t4_count)
+                    # Get best players from each tier
+                    t1_players = get_tier_players(1, t1_budget, t1_count)
+                    t2_players = get_tier_players(2, t2_budget, t2_count)
+                    t3_players = get_tier_players(3, t3_budget, t3_count)
+                    t4_players = get_tier_players(4, t4_budget, t4_count)
                     
                     # Make sure we have at least 2 non-cis players
                     combined_team = pd.concat([t1_players, t2_players, t3_players, t4_players])
-                    non_cis_count = len(combined_team[combined_team['Gender'] == 'Women'])
+                    non_cis_count = len(combined_team[combined_team['Gender'] == NON_CIS_GENDER])
                     
                     if non_cis_count < MIN_NON_CIS:
                         st.warning(f"Only {non_cis_count} non-cis players in simulated team. Adjusting...")
                         
                         # Find non-cis players to add
                         non_cis_players = auction_guide[
-                            (auction_guide['Gender'] == 'Women') & 
+                            (auction_guide['Gender'] == NON_CIS_GENDER) & 
                             (~auction_guide['Player'].isin(combined_team['Player'])) &
                             (~auction_guide['Player'].isin(st.session_state.sold_players))
                         ].sort_values(['Value_Score'], ascending=[False])
@@ -494,11 +862,11 @@ def show_simulation_tab(auction_guide, tab):
                         
                         players = auction_guide[
                             (auction_guide['Primary_Position'].isin(positions)) & 
-                            (auction_guide['Price'] <= budget) &
                             (~auction_guide['Player'].isin(st.session_state.sold_players))
-                        ].sort_values(['Value_Score'], ascending=[False]).head(count)
+                        ].sort_values(['Value_Score'], ascending=[False])
                         
-                        return players
+                        # Keep the group's combined price within its budget
+                        return pick_within_budget(players, budget, count)
                     
                     # Get players for each position
                     forwards = get_position_players(['Forward'], fwd_budget, fwd_count)
@@ -510,14 +878,14 @@ def show_simulation_tab(auction_guide, tab):
                     simulated_team = pd.concat([forwards, midfielders, defenders, goalkeepers])
                     
                     # Check for non-cis requirement
-                    non_cis_count = len(simulated_team[simulated_team['Gender'] == 'Women'])
+                    non_cis_count = len(simulated_team[simulated_team['Gender'] == NON_CIS_GENDER])
                     
                     if non_cis_count < MIN_NON_CIS:
                         st.warning(f"Only {non_cis_count} non-cis players in simulated team. Adjusting...")
                         
                         # Find non-cis players to add
                         non_cis_players = auction_guide[
-                            (auction_guide['Gender'] == 'Women') & 
+                            (auction_guide['Gender'] == NON_CIS_GENDER) & 
                             (~auction_guide['Player'].isin(simulated_team['Player'])) &
                             (~auction_guide['Player'].isin(st.session_state.sold_players))
                         ].sort_values(['Value_Score'], ascending=[False])
@@ -539,9 +907,9 @@ def show_simulation_tab(auction_guide, tab):
                 # Display team stats
                 if len(simulated_team) > 0:
                     # Calculate team metrics
-                    total_cost = simulated_team['Price'].sum()
+                    total_cost = float(simulated_team['Price'].sum())
                     avg_value = simulated_team['Value_Score'].mean()
-                    non_cis_count = len(simulated_team[simulated_team['Gender'] == 'Women'])
+                    non_cis_count = len(simulated_team[simulated_team['Gender'] == NON_CIS_GENDER])
                     
                     # Display metrics
                     st.metric("Team Cost", f"₹{total_cost:.1f}M", f"{(total_cost/TOTAL_BUDGET)*100:.1f}% of budget")
@@ -565,32 +933,21 @@ def show_simulation_tab(auction_guide, tab):
                     
                     # Button to add all players to team
                     if st.button("Add Team to My Roster", key="add_team_btn"):
-                        # Check if we can afford the team
-                        if total_cost <= st.session_state.remaining_budget:
-                            # Check for duplicates
-                            current_players = [p['Player'] for p in st.session_state.team_players]
-                            new_players_added = 0
-                            
-                            for _, player in simulated_team.iterrows():
-                                if player['Player'] not in current_players:
-                                    st.session_state.team_players.append({
-                                        'Player': player['Player'],
-                                        'Tier': player['Tier'],
-                                        'Price': player['Price'],
-                                        'Gender': player['Gender'],
-                                        'Position': player['Primary_Position'],
-                                        'Value_Score': player['Value_Score']
-                                    })
-                                    new_players_added += 1
+                        # Only players not already in the team are added and paid for
+                        new_players = simulated_team[~simulated_team['Player'].isin(list(st.session_state.team_players_by_name))]
+                        new_cost = float(new_players['Price'].sum())
+                        
+                        # Check if we can afford the new players before adding any of them
+                        if new_players.empty:
+                            st.info("All these players are already in your team.")
+                        elif new_cost <= st.session_state.remaining_budget:
+                            for _, player in new_players.iterrows():
+                                add_team_player(player['Player'], player)
                             
-                            if new_players_added > 0:
-                                st.session_state.remaining_budget -= total_cost
-                                st.success(f"Added {new_players_added} players to your team!")
-                                st.rerun()
-                            else:
-                                st.info("All these players are already in your team.")
+                            st.success(f"Added {len(new_players)} players to your team!")
+                            st.rerun()
                         else:
-                            st.error(f"Not enough budget! This team costs ₹{total_cost}M but you only have ₹{st.session_state.remaining_budget}M.")
+                            st.error(f"Not enough budget! These players cost ₹{new_cost}M but you only have ₹{st.session_state.remaining_budget}M.")
                     
                 else:
                     st.error("Could not create a valid team with the current budget allocation.")
@@ -642,10 +999,8 @@ def show_simulation_tab(auction_guide, tab):
                 st.subheader("Top Value Players")
                 value_tier = st.selectbox("Select Tier:", [1, 2, 3, 4], key="value_tier")
                 
-                value_players = auction_guide[
-                    (auction_guide['Tier'] == value_tier) &
-                    (~auction_guide['Player'].isin(st.session_state.sold_players))
-                ].sort_values('Value_Score', ascending=False).head(5)
+                tier_players = auction_guide.loc[get_tier_value_order(auction_guide, id(auction_guide)).get(value_tier, [])]
+                value_players = tier_players[~tier_players['Player'].isin(st.session_state.sold_players)].head(5)
                 
                 if len(value_players) > 0:
                     st.dataframe(
@@ -658,32 +1013,47 @@ def show_top_targets_tab(top_picks, tab):
     with tab:
         st.header("Top Targets")
         
+        # Show the bid modal once above the category tabs, since a player can be listed in several
+        bid_players = top_picks[top_picks['Player'] == st.session_state.current_bid_player]
+        if not bid_players.empty:
+            player = bid_players.iloc[0]
+            recommended = float(player['Recommended']) if pd.notna(player['Recommended']) else None
+            value_score = float(player['Value_Score']) if pd.notna(player['Value_Score']) else 1.0
+            is_high_priority = pd.notna(player['Selection_Reason']) and 'top player' in str(player['Selection_Reason']).lower()
+            
+            try:
+                max_bid = calculate_max_bid(st.session_state.remaining_budget, st.session_state.players_needed,
+                                            value_score, is_high_priority, BID_STRATEGY)
+            except:
+                max_bid = None
+            
+            show_bid_modal(
+                player['Player'],
+                player['pid'],
+                recommended_price=recommended,
+                max_bid=max_bid,
+                current_budget=st.session_state.remaining_budget,
+                on_confirm=confirm_bid,
+                args=(player['Player'], player),
+                on_cancel=cancel_bid
+            )
+        
         # Create tabs for different player categories
         category_tabs = st.tabs(["All Players", "Tier 1", "Tier 2", "Tier 3", "Tier 4", "Best Value"])
         
-        # Group players by category for easier filtering
-        categories = {
-            "All Players": top_picks,
-            "Tier 1": top_picks[top_picks["Tier"] == 1],
-            "Tier 2": top_picks[top_picks["Tier"] == 2],
-            "Tier 3": top_picks[top_picks["Tier"] == 3],
-            "Tier 4": top_picks[top_picks["Tier"] == 4],
-            "Best Value": top_picks[top_picks["Selection_Reason"].str.contains("value", case=False, na=False)]
-        }
+        # Group players by category for easier filtering, each already sorted by auction score
+        categories = get_top_picks_by_category(top_picks, id(top_picks))
+        budget_fit = get_budget_fit(top_picks, id(top_picks), st.session_state.remaining_budget)
         
         # Display players in each category tab
         for i, (category, players) in enumerate(categories.items()):
             with category_tabs[i]:
                 st.subheader(f"{category} ({len(players)} players)")
                 
-                # Sort players by auction score (descending)
-                if not players.empty and "Auction_Score" in players.columns:
-                    players = players.sort_values("Auction_Score", ascending=False)
-                
                 # Create expandable sections for each player
-                for idx, (_, player) in enumerate(players.iterrows()):
-                    # Create a unique key based on player name, category and index
-                    unique_key = f"{player['Player']}_{category}_{idx}"
+                for _, player in players.iterrows():
+                    # Create a unique key based on category and player id
+                    unique_key = f"{category}_{player['pid']}"
                     
                     # Check if player exists in data
                     if pd.isna(player['Player']):
@@ -691,7 +1061,7 @@ def show_top_targets_tab(top_picks, tab):
                     
                     # Check if player is already in team
                     player_name = player['Player']
-                    player_bought = player_name in [p['Player'] for p in st.session_state.team_players]
+                    player_bought = player_name in st.session_state.team_players_by_name
                     player_sold = player_name in st.session_state.sold_players
                     
                     # Format the expander title
@@ -707,6 +1077,7 @@ def show_top_targets_tab(top_picks, tab):
                             st.markdown(f"**Gender:** {player['Gender']}")
                             st.markdown(f"**Value Score:** {player['Value_Score']:.2f}")
                             st.markdown(f"**Auction Score:** {player['Auction_Score']:.1f}")
+                            st.markdown(f"**Budget Fit:** {budget_fit[player.name]}")
                             
                             # Show recommendation reason
                             if pd.notna(player['Selection_Reason']):
@@ -730,15 +1101,7 @@ def show_top_targets_tab(top_picks, tab):
                                 if st.button(f"Add to Team", key=add_btn_key):
                                     # Check if we can afford the player
                                     if player['Price'] <= st.session_state.remaining_budget:
-                                        st.session_state.team_players.append({
-                                            'Player': player['Player'],
-                                            'Tier': player['Tier'],
-                                            'Price': player['Price'],
-                                            'Gender': player['Gender'],
-                                            'Position': player['Primary_Position'],
-                                            'Value_Score': player['Value_Score']
-                                        })
-                                        st.session_state.remaining_budget -= player['Price']
+                                        add_team_player(player['Player'], player)
                                         st.success(f"Added {player['Player']} to your team!")
                                     else:
                                         st.error(f"Not enough budget to add this player (₹{player['Price']}M)!")
@@ -768,105 +1131,12 @@ def show_top_targets_tab(top_picks, tab):
                             # Bid button with unique key
                             bid_btn_key = f"bid_{unique_key}"
                             if not player_bought and not player_sold:
-                                if st.button("Bid", key=bid_btn_key):
-                                    st.session_state.current_bid_player = player_name
-                                    st.rerun()
+                                st.button("Bid", key=bid_btn_key, on_click=start_bid, args=(player_name,))
                             
                             # Compare button
                             compare_btn_key = f"compare_{unique_key}"
                             if st.button("Compare", key=compare_btn_key):
                                 st.success(f"Added {player['Player']} to comparison. Feature coming soon.")
-                
-                    # Show bid modal if this is the current bid player
-                    if st.session_state.current_bid_player == player_name:
-                        st.markdown("### Place Bid")
-                        
-                        # Get values for bidding
-                        recommended = float(player['Recommended']) if pd.notna(player['Recommended']) else None
-                        value_score = float(player['Value_Score']) if pd.notna(player['Value_Score']) else 1.0
-                        is_high_priority = True if 'Selection_Reason' in player and pd.notna(player['Selection_Reason']) and 'top player' in str(player['Selection_Reason']).lower() else False
-                        current_budget = st.session_state.remaining_budget
-                        
-                        # Display bidding information
-                        st.info(f"Remaining Budget: ₹{current_budget}M")
-                        if recommended:
-                            st.write(f"Recommended Price: ₹{recommended}M")
-                        
-                        # Calculate max bid if we can
-                        try:
-                            max_bid = calculate_max_bid(current_budget, 
-                                                      TEAM_SIZE - len(st.session_state.team_players), 
-                                                      value_score, is_high_priority)
-                            st.write(f"Maximum Bid: ₹{max_bid}M")
-                        except:
-                            max_bid = None
-                        
-                        # Bid slider
-                        min_bid = 0.5
-                        max_possible_bid = min(100.0, current_budget or 100.0) 
-                        
-                        # Initialize bid amount
-                        initial_bid = recommended or max_bid or min_bid
-                        if initial_bid > max_possible_bid:
-                            initial_bid = max_possible_bid
-                            
-                        bid_amount = st.slider(
-                            "Your Bid (₹M)", 
-                            min_value=min_bid, 
-                            max_value=max_possible_bid,
-                            value=float(initial_bid),
-                            step=0.5,
-                            key=f"bid_slider_{unique_key}"
-                        )
-                        
-                        # Final price input
-                        final_price = st.number_input(
-                            "Final Price Paid (₹M)",
-                            min_value=0.0,
-                            max_value=max_possible_bid,
-                            value=bid_amount,
-                            step=0.5,
-                            key=f"final_price_{unique_key}"
-                        )
-                        
-                        # Buttons
-                        confirm_col, cancel_col = st.columns(2)
-                        with confirm_col:
-                            confirm_key = f"confirm_bid_{unique_key}"
-                            if st.button("Confirm and Add to Team", key=confirm_key):
-                                # Check if we can afford the player
-                                if final_price <= current_budget:
-                                    # Add to team with bid information
-                                    st.session_state.team_players.append({
-                                        'Player': player_name,
-                                        'Tier': player['Tier'],
-                                        'Price': player['Price'],
-                                        'Gender': player['Gender'],
-                                        'Position': player['Primary_Position'],
-                                        'Value_Score': player['Value_Score'],
-                                        'Bid': bid_amount,
-                                        'Final_Price': final_price
-                                    })
-                                    # Update budget based on final price
-                                    st.session_state.remaining_budget -= final_price
-                                    # Add to bid history
-                                    st.session_state.bid_history[player_name] = {
-                                        'bid': bid_amount,
-                                        'final_price': final_price
-                                    }
-                                    # Clear current bid player
-                                    st.session_state.current_bid_player = None
-                                    st.success(f"Successfully bid ₹{bid_amount}M and acquired {player_name} for ₹{final_price}M!")
-                                    st.rerun()
-                                else:
-                                    st.error(f"Not enough budget to pay ₹{final_price}M for this player!")
-                                    
-                        with cancel_col:
-                            cancel_key = f"cancel_bid_{unique_key}"
-                            if st.button("Cancel", key=cancel_key):
-                                # Clear current bid player
-                                st.session_state.current_bid_player = None
-                                st.rerun()
 
 # Function to display player search tab
 def show_player_search_tab(auction_guide, tab):
@@ -970,89 +1240,26 @@ def show_player_search_tab(auction_guide, tab):
         
         # Apply filters
         try:
-            filtered_players = auction_guide.copy()
-            
-            # Ensure required columns exist for filtering
-            required_columns = ['Player', 'Gender', 'Tier', 'Price', 'Value_Score', 'Primary_Position']
-            for col in required_columns:
-                if col not in filtered_players.columns:
-                    filtered_players[col] = None
-            
-            # Apply text search filter
-            if st.session_state.search_query != "":
-                if 'Player' in filtered_players.columns:
-                    # Make search more flexible by allowing partial matches
-                    filtered_players = filtered_players[filtered_players["Player"].str.contains(
-                        st.session_state.search_query, case=False, na=False)]
-            
-            # Apply tier filter with NA handling
-            if st.session_state.tier_filter != "All" and 'Tier' in filtered_players.columns:
-                # Only filter on rows where Tier is not NA
-                filtered_players = filtered_players[
-                    (filtered_players["Tier"] == st.session_state.tier_filter) | 
-                    (filtered_players["Tier"].isna() & (st.session_state.tier_filter == "All"))
-                ]
-            
-            # Apply position filter with more lenient matching
-            if st.session_state.position_filter != "All" and 'Primary_Position' in filtered_players.columns:
-                # Case-insensitive position matching, allowing NA positions to pass through when filter is "All"
-                filtered_players = filtered_players[
-                    (filtered_players["Primary_Position"].str.contains(
-                        st.session_state.position_filter, case=False, na=False)) | 
-                    (filtered_players["Primary_Position"].isna() & (st.session_state.position_filter == "All"))
-                ]
-            
-            # Apply gender filter, preserving NA when filter is "All"
-            if st.session_state.gender_filter != "All" and 'Gender' in filtered_players.columns:
-                filtered_players = filtered_players[
-                    (filtered_players["Gender"] == st.session_state.gender_filter) | 
-                    (filtered_players["Gender"].isna() & (st.session_state.gender_filter == "All"))
-                ]
-            
-            # Apply value filter, ignoring NA values when filter is "All"
-            if st.session_state.value_filter != "All" and 'Value_Score' in filtered_players.columns:
-                if st.session_state.value_filter == "Excellent (>=2.0)":
-                    filtered_players = filtered_players[
-                        (filtered_players["Value_Score"] >= 2.0) | 
-                        (filtered_players["Value_Score"].isna() & (st.session_state.value_filter == "All"))
-                    ]
-                elif st.session_state.value_filter == "Good (>=1.5)":
-                    filtered_players = filtered_players[
-                        (filtered_players["Value_Score"] >= 1.5) | 
-                        (filtered_players["Value_Score"].isna() & (st.session_state.value_filter == "All"))
-                    ]
-                elif st.session_state.value_filter == "Fair (>=1.0)":
-                    filtered_players = filtered_players[
-                        (filtered_players["Value_Score"] >= 1.0) | 
-                        (filtered_players["Value_Score"].isna() & (st.session_state.value_filter == "All"))
-                    ]
-                elif st.session_state.value_filter == "Poor (<1.0)":
-                    filtered_players = filtered_players[
-                        (filtered_players["Value_Score"] < 1.0) | 
-                        (filtered_players["Value_Score"].isna() & (st.session_state.value_filter == "All"))
-                    ]
-            
-            # Apply price range filter, handling NA values
-            if 'Price' in filtered_players.columns:
-                # Include both players within price range and players with no price data when using "All"
-                filtered_players = filtered_players[
-                    ((filtered_players["Price"] >= st.session_state.price_range_min) & 
-                    (filtered_players["Price"] <= st.session_state.price_range_max)) | 
-                    (filtered_players["Price"].isna())
-                ]
-            
-            # Apply availability filter
-            if availability == "Available Only":
-                filtered_players = filtered_players[~filtered_players["Player"].isin(st.session_state.sold_players)]
-            elif availability == "Sold Players Only":
-                filtered_players = filtered_players[filtered_players["Player"].isin(st.session_state.sold_players)]
-            
-            # Apply top picks filter with NA handling
-            if st.session_state.show_top_picks and 'Auction_Priority' in filtered_players.columns:
-                filtered_players = filtered_players[
-                    (filtered_players["Auction_Priority"] == "High") | 
-                    (filtered_players["Auction_Priority"].isna() & st.session_state.show_top_picks == False)
-                ]
+            filters = {
+                "search_query": st.session_state.search_query,
+                "tier": st.session_state.tier_filter,
+                "position": st.session_state.position_filter,
+                "gender": st.session_state.gender_filter,
+                "value": st.session_state.value_filter,
+                "price_min": st.session_state.price_range_min,
+                "price_max": st.session_state.price_range_max,
+                "availability": availability,
+                "top_picks_only": st.session_state.show_top_picks,
+            }
+            
+            # Only filter again when the filters, sold players or guide have changed, so
+            # reruns from paging, sorting or card buttons reuse the last result
+            filter_key = (id(auction_guide), tuple(sorted(filters.items())), tuple(st.session_state.sold_players))
+            if st.session_state.get("search_filter_key") != filter_key:
+                st.session_state.search_filtered_players = filter_players(
+                    auction_guide, filters, st.session_state.sold_players)
+                st.session_state.search_filter_key = filter_key
+            filtered_players = st.session_state.search_filtered_players
             
             # Calculate players to display and handle pagination
             player_count = len(filtered_players)
@@ -1177,13 +1384,28 @@ def show_player_search_tab(auction_guide, tab):
                     if field not in players_to_display.columns:
                         players_to_display[field] = default
                 
-                for idx, (_, player) in enumerate(players_to_display.iterrows()):
-                    # Generate a unique ID for each player card
-                    player_id = f"player_{player['Player']}_{idx}_{current_page}"
+                # Resolve missing-value checks for the whole page in one pass
+                notna_df = players_to_display.notna()
+                max_bids = compute_max_bids(
+                    auction_guide, id(auction_guide), st.session_state.remaining_budget,
+                    st.session_state.players_needed, BID_STRATEGY
+                )
+                
+                for idx, (row_id, player) in enumerate(players_to_display.iterrows()):
+                    notna = notna_df.iloc[idx].to_dict()
+                    
+                    # Convert numeric fields to Python floats once for formatting
+                    pv = {
+                        'price': float(player['Price']) if notna['Price'] else None,
+                        'recommended': float(player['Recommended']) if notna['Recommended'] else None,
+                        'value_score': float(player['Value_Score']) if notna['Value_Score'] else None,
+                        'historical_avg': float(player['Historical_Avg']) if notna['Historical_Avg'] else None,
+                        'auction_score': float(player['Auction_Score']) if notna['Auction_Score'] else None
+                    }
                     
                     # Check if the player is already in sold list
                     player_sold = player['Player'] in st.session_state.sold_players
-                    player_bought = player['Player'] in [p['Player'] for p in st.session_state.team_players]
+                    player_bought = player['Player'] in st.session_state.team_players_by_name
                     
                     # Apply gray overlay for sold players
                     if player_sold and not player_bought:
@@ -1192,117 +1414,113 @@ def show_player_search_tab(auction_guide, tab):
                         st.markdown('<div class="player-card">', unsafe_allow_html=True)
                     
                     # Player Name and Basic Info - safely access all fields with defaults
-                    player_name = player['Player'] if pd.notna(player['Player']) else "Unknown Player"
+                    player_name = player['Player'] if notna['Player'] else "Unknown Player"
+                    pid = player['pid']
                     st.markdown(f"## {player_name}")
                     
-                    # Basic info in columns
+                    # Player details and analysis share a single column row; each column
+                    # is rendered as one markdown block instead of a call per line
                     col1, col2, col3 = st.columns([1, 1, 1])
+                    details_md = []
+                    pricing_md = []
+                    history_md = []
                     
-                    with col1:
-                        if pd.notna(player['Tier']):
-                            try:
-                                tier_value = int(player['Tier'])
-                                st.markdown(f"<span class='tier-{tier_value}'>Tier {tier_value}</span>", unsafe_allow_html=True)
-                            except (ValueError, TypeError):
-                                st.write("**Tier:** Unknown")
-                        else:
-                            st.write("**Tier:** Not specified")
-                            
-                        gender = player['Gender'] if pd.notna(player['Gender']) else "Not specified"
-                        st.write(f"**Gender:** {gender}")
+                    if notna['Tier']:
+                        try:
+                            tier_value = int(player['Tier'])
+                            details_md.append(f"<span class='tier-{tier_value}'>Tier {tier_value}</span>")
+                        except (ValueError, TypeError):
+                            details_md.append("**Tier:** Unknown")
+                    else:
+                        details_md.append("**Tier:** Not specified")
                         
-                        position = player['Primary_Position'] if pd.notna(player['Primary_Position']) else "Not specified"
-                        st.write(f"**Position:** {position}")
+                    gender = player['Gender'] if notna['Gender'] else "Not specified"
+                    details_md.append(f"**Gender:** {gender}")
                     
-                    with col2:
-                        if pd.notna(player['Price']):
-                            st.write(f"**Price:** ₹{player['Price']}M")
-                        else:
-                            st.write("**Price:** Not specified")
-                            
-                        if pd.notna(player['Recommended']):
-                            st.write(f"**Recommended:** ₹{player['Recommended']}M")
-                        else:
-                            st.write("**Recommended:** Not available")
-                            
-                        if pd.notna(player['Value_Score']):
-                            value_class = get_value_class(player['Value_Score'])
-                            st.markdown(f"**Value:** <span class='{value_class}'>{player['Value_Score']:.2f}</span>", unsafe_allow_html=True)
-                        else:
-                            st.write("**Value:** Not calculated")
+                    position = player['Primary_Position'] if notna['Primary_Position'] else "Not specified"
+                    details_md.append(f"**Position:** {position}")
                     
-                    with col3:
-                        if pd.notna(player['Historical_Avg']):
-                            st.write(f"**Historical Avg:** ₹{player['Historical_Avg']}M")
-                        else:
-                            st.write("**Historical Avg:** No data")
-                            
-                        if pd.notna(player['APL_Editions']):
-                            st.write(f"**APL Editions:** {player['APL_Editions']}")
-                        else:
-                            st.write("**APL Editions:** 0")
-                            
-                        if pd.notna(player['Auction_Score']):
-                            st.write(f"**Auction Score:** {player['Auction_Score']}")
-                        else:
-                            st.write("**Auction Score:** Not calculated")
+                    if notna['Price']:
+                        pricing_md.append(f"**Price:** ₹{pv['price']:.1f}M")
+                    else:
+                        pricing_md.append("**Price:** Not specified")
                         
-                        # Auction priority if available
-                        if pd.notna(player['Auction_Priority']):
-                            priority = player['Auction_Priority']
-                            priority_color = "#4CAF50" if priority == "High" else "#FFC107" if priority == "Medium" else "#F44336"
-                            st.markdown(f"**Priority:** <span style='color:{priority_color};font-weight:bold;'>{priority}</span>", unsafe_allow_html=True)
-                        else:
-                            st.write("**Priority:** Not assigned")
+                    if notna['Recommended']:
+                        pricing_md.append(f"**Recommended:** ₹{pv['recommended']:.1f}M")
+                    else:
+                        pricing_md.append("**Recommended:** Not available")
+                        
+                    if notna['Value_Score']:
+                        value_class = get_value_class(player['Value_Tier'])
+                        pricing_md.append(f"**Value:** <span class='{value_class}'>{pv['value_score']:.2f}</span>")
+                    else:
+                        pricing_md.append("**Value:** Not calculated")
                     
-                    # Only show Player Analysis section if we have some data
-                    if (pd.notna(player['Bidding_Strategy']) or 
-                        pd.notna(player['Selection_Reason']) or 
-                        pd.notna(player['Secondary_Position']) or
-                        pd.notna(player['Value_Score'])):
+                    if notna['Historical_Avg']:
+                        history_md.append(f"**Historical Avg:** ₹{pv['historical_avg']:.1f}M")
+                    else:
+                        history_md.append("**Historical Avg:** No data")
                         
-                        st.markdown("### Player Analysis")
-                        col1, col2 = st.columns(2)
+                    if notna['APL_Editions']:
+                        history_md.append(f"**APL Editions:** {player['APL_Editions']}")
+                    else:
+                        history_md.append("**APL Editions:** 0")
                         
-                        with col1:
-                            # Bidding strategy
-                            if pd.notna(player['Bidding_Strategy']):
-                                st.write(f"**Bidding Strategy:** {player['Bidding_Strategy']}")
-                            
-                            # Selection reason if available
-                            if pd.notna(player['Selection_Reason']):
-                                st.write(f"**Selection Reason:** {player['Selection_Reason']}")
-                            
-                            # Other player details
-                            if pd.notna(player['Secondary_Position']):
-                                st.write(f"**Secondary Position:** {player['Secondary_Position']}")
+                    if notna['Auction_Score']:
+                        history_md.append(f"**Auction Score:** {pv['auction_score']:.1f}")
+                    else:
+                        history_md.append("**Auction Score:** Not calculated")
+                    
+                    # Auction priority if available
+                    if notna['Auction_Priority']:
+                        priority = player['Auction_Priority']
+                        priority_color = "#4CAF50" if priority == "High" else "#FFC107" if priority == "Medium" else "#F44336"
+                        history_md.append(f"**Priority:** <span style='color:{priority_color};font-weight:bold;'>{priority}</span>")
+                    else:
+                        history_md.append("**Priority:** Not assigned")
+                    
+                    # Only add Player Analysis details if we have some data
+                    if (notna['Bidding_Strategy'] or 
+                        notna['Selection_Reason'] or 
+                        notna['Secondary_Position'] or
+                        notna['Value_Score']):
                         
-                        with col2:
-                            # Default to showing recommend actions even with incomplete data
-                            remaining_budget = st.session_state.remaining_budget
-                            players_needed = TEAM_SIZE - len(st.session_state.team_players)
+                        # Bidding strategy
+                        if notna['Bidding_Strategy']:
+                            details_md.append(f"**Bidding Strategy:** {player['Bidding_Strategy']}")
+                        
+                        # Selection reason if available
+                        if notna['Selection_Reason']:
+                            details_md.append(f"**Selection Reason:** {player['Selection_Reason']}")
+                        
+                        # Other player details
+                        if notna['Secondary_Position']:
+                            details_md.append(f"**Secondary Position:** {player['Secondary_Position']}")
+                        
+                        # Default to showing recommend actions even with incomplete data
+                        is_high_priority = (player['Auction_Priority'] == "High") if notna['Auction_Priority'] else False
+                        
+                        # Calculate max bid using available data or defaults
+                        try:
+                            player_price = pv['price'] if notna['Price'] else 0
+                            max_bid = max_bids[row_id]
+                            pricing_md.append(f"**Maximum Bid:** ₹{max_bid:.1f}M")
                             
-                            # Set defaults for calculation
-                            value_score = player['Value_Score'] if pd.notna(player['Value_Score']) else 1.0
-                            is_high_priority = (player['Auction_Priority'] == "High") if pd.notna(player['Auction_Priority']) else False
+                            # Buy/Pass recommendation - more lenient with incomplete data
+                            if not notna['Price'] or player_price <= max_bid:
+                                rec = "BUY" if is_high_priority else "Consider"
+                                rec_color = "#4CAF50" if is_high_priority else "#2196F3"
+                            else:
+                                rec = "PASS"
+                                rec_color = "#F44336"
                             
-                            # Calculate max bid using available data or defaults
-                            try:
-                                player_price = float(player['Price']) if pd.notna(player['Price']) else 0
-                                max_bid = calculate_max_bid(remaining_budget, players_needed, value_score, is_high_priority)
-                                st.markdown(f"**Maximum Bid:** ₹{max_bid:.1f}M")
-                                
-                                # Buy/Pass recommendation - more lenient with incomplete data
-                                if pd.isna(player['Price']) or player_price <= max_bid:
-                                    rec = "BUY" if is_high_priority else "Consider"
-                                    rec_color = "#4CAF50" if is_high_priority else "#2196F3"
-                                else:
-                                    rec = "PASS"
-                                    rec_color = "#F44336"
-                                
-                                st.markdown(f"<div style='text-align:center; padding:5px; background-color:{rec_color}; color:white; border-radius:3px; font-weight:bold;'>{rec}</div>", unsafe_allow_html=True)
-                            except Exception as e:
-                                st.write("**Recommendation:** Insufficient data")
+                            pricing_md.append(f"<div style='text-align:center; padding:5px; background-color:{rec_color}; color:white; border-radius:3px; font-weight:bold;'>{rec}</div>")
+                        except Exception as e:
+                            pricing_md.append("**Recommendation:** Insufficient data")
+                    
+                    col1.markdown("\n\n".join(details_md), unsafe_allow_html=True)
+                    col2.markdown("\n\n".join(pricing_md), unsafe_allow_html=True)
+                    col3.markdown("\n\n".join(history_md), unsafe_allow_html=True)
                     
                     # Action buttons row
                     button_col1, button_col2, button_col3 = st.columns(3)
@@ -1310,28 +1528,13 @@ def show_player_search_tab(auction_guide, tab):
                     with button_col1:
                         if not player_sold and not player_bought:
                             # Add to team button with unique key
-                            button_key = f"add_search_{player_name}_{idx}_{current_page}"
+                            button_key = f"add_search_{pid}"
                             if st.button(f"Add to Team", key=button_key):
-                                # Get default values for required fields
-                                player_price = float(player['Price']) if pd.notna(player['Price']) else 0
-                                player_tier = int(player['Tier']) if pd.notna(player['Tier']) else 4
-                                player_gender = player['Gender'] if pd.notna(player['Gender']) else "Not specified"
-                                player_position = player['Primary_Position'] if pd.notna(player['Primary_Position']) else "Not specified"
-                                player_value = float(player['Value_Score']) if pd.notna(player['Value_Score']) else 1.0
+                                player_price = float(player['Price'])
                                 
                                 # Check if we can afford the player
                                 if player_price <= st.session_state.remaining_budget:
-                                    st.session_state.team_players.append({
-                                        'Player': player_name,
-                                        'Tier': player_tier,
-                                        'Price': player_price,
-                                        'Gender': player_gender,
-                                        'Position': player_position,
-                                        'Value_Score': player_value,
-                                        'Bid': None,
-                                        'Final_Price': player_price
-                                    })
-                                    st.session_state.remaining_budget -= player_price
+                                    add_team_player(player_name, player)
                                     st.success(f"Added {player_name} to your team!")
                                     st.rerun()
                                 else:
@@ -1340,137 +1543,66 @@ def show_player_search_tab(auction_guide, tab):
                             st.markdown("<div style='text-align:center; padding:5px; background-color:#4CAF50; color:white; border-radius:3px; font-weight:bold;'>IN TEAM</div>", unsafe_allow_html=True)
                             
                             # Remove from team button with unique key
-                            remove_key = f"remove_{player_name}_{idx}_{current_page}"
+                            remove_key = f"remove_{pid}"
                             if st.button(f"Remove", key=remove_key):
-                                # Get player's info
-                                for i, team_player in enumerate(st.session_state.team_players):
-                                    if team_player['Player'] == player_name:
-                                        st.session_state.remaining_budget += team_player['Final_Price'] or team_player['Price']
-                                        st.session_state.team_players.pop(i)
-                                        st.success(f"Removed {player_name} from your team.")
-                                        st.rerun()
-                                        break
+                                remove_team_player(player_name)
+                                st.success(f"Removed {player_name} from your team.")
+                                st.rerun()
                         else:
                             st.markdown("<div style='text-align:center; padding:5px; background-color:#9E9E9E; color:white; border-radius:3px; font-weight:bold;'>SOLD</div>", unsafe_allow_html=True)
                     
                     with button_col2:
                         if not player_sold and not player_bought:
-                            # Replace the bid button with direct bid options
-                            st.markdown("### Bid Options")
-                            
-                            # Get values for bidding
-                            recommended = float(player['Recommended']) if pd.notna(player['Recommended']) else None
-                            value_score = float(player['Value_Score']) if pd.notna(player['Value_Score']) else 1.0
-                            is_high_priority = (player['Auction_Priority'] == "High") if pd.notna(player['Auction_Priority']) and 'Auction_Priority' in player else False
-                            current_budget = st.session_state.remaining_budget
-                            
-                            # Calculate max bid
-                            try:
-                                max_bid = calculate_max_bid(current_budget, 
-                                                                 TEAM_SIZE - len(st.session_state.team_players), 
-                                                                 value_score, is_high_priority)
-                                st.write(f"Max bid: ₹{max_bid}M")
-                            except:
-                                max_bid = None
-                            
-                            # Recommended price
-                            if recommended:
-                                st.write(f"Rec: ₹{recommended}M")
-                            
-                            # Bid slider
-                            min_bid = 0.5
-                            max_possible_bid = min(50.0, current_budget or 50.0) 
-                            
-                            # Initialize bid amount
-                            initial_bid = recommended or max_bid or min_bid
-                            if initial_bid > max_possible_bid:
-                                initial_bid = max_possible_bid
-                                
-                            bid_amount = st.slider(
-                                "Bid (₹M)", 
-                                min_value=min_bid, 
-                                max_value=max_possible_bid,
-                                value=float(initial_bid),
-                                step=0.5,
-                                key=f"bid_slider_{player_name}_{idx}"
-                            )
-                            
-                            # Final price input
-                            final_price = st.number_input(
-                                "Final Price (₹M)",
-                                min_value=0.0,
-                                max_value=max_possible_bid,
-                                value=bid_amount,
-                                step=0.5,
-                                key=f"final_price_{player_name}_{idx}"
-                            )
-                            
-                            # Confirm bid button
-                            confirm_key = f"confirm_bid_{player_name}_{idx}"
-                            if st.button("Confirm Bid", key=confirm_key):
-                                # Get default values for required fields
-                                player_price = float(player['Price']) if pd.notna(player['Price']) else 0
-                                player_tier = int(player['Tier']) if pd.notna(player['Tier']) else 4
-                                player_gender = player['Gender'] if pd.notna(player['Gender']) else "Not specified"
-                                player_position = player['Primary_Position'] if pd.notna(player['Primary_Position']) else "Not specified"
-                                player_value = float(player['Value_Score']) if pd.notna(player['Value_Score']) else 1.0
-                                
-                                # Check if we can afford the player
-                                if final_price <= st.session_state.remaining_budget:
-                                    # Add to team with bid information
-                                    st.session_state.team_players.append({
-                                        'Player': player_name,
-                                        'Tier': player_tier,
-                                        'Price': player_price,
-                                        'Gender': player_gender,
-                                        'Position': player_position,
-                                        'Value_Score': player_value,
-                                        'Bid': bid_amount,
-                                        'Final_Price': final_price
-                                    })
-                                    # Update budget based on final price
-                                    st.session_state.remaining_budget -= final_price
-                                    # Add to bid history
-                                    st.session_state.bid_history[player_name] = {
-                                        'bid': bid_amount,
-                                        'final_price': final_price
-                                    }
-                                    st.success(f"Acquired {player_name} for ₹{final_price}M!")
-                                    st.rerun()
-                                else:
-                                    st.error(f"Not enough budget to pay ₹{final_price}M!")
+                            # Bid button opens the shared bid modal below the buttons
+                            st.button("Bid", key=f"bid_search_{pid}", on_click=start_bid, args=(player_name,))
                         
                         elif player_sold:
                             # Mark as available button with unique key
-                            avail_key = f"avail_{player_name}_{idx}_{current_page}"
+                            avail_key = f"avail_{pid}"
                             if st.button(f"Mark Available", key=avail_key):
                                 st.session_state.sold_players.remove(player_name)
                                 st.success(f"Marked {player_name} as available.")
                                 st.rerun()
                         elif player_bought:
                             # Show bid info if available
-                            for team_player in st.session_state.team_players:
-                                if team_player['Player'] == player_name:
-                                    if 'Bid' in team_player and team_player['Bid'] is not None:
-                                        st.write(f"Bid: ₹{team_player['Bid']}M")
-                                        st.write(f"Final: ₹{team_player['Final_Price']}M")
-                                    break
+                            team_player = st.session_state.team_players_by_name[player_name]
+                            if 'Bid' in team_player and team_player['Bid'] is not None:
+                                st.write(f"Bid: ₹{team_player['Bid']}M")
+                                st.write(f"Final: ₹{team_player['Final_Price']}M")
                     
                     with button_col3:
                         # Button to mark player as sold to another team
                         if not player_sold and not player_bought:
-                            sold_key = f"sold_{player_name}_{idx}_{current_page}"
+                            sold_key = f"sold_{pid}"
                             if st.button(f"Mark as Sold", key=sold_key):
                                 st.session_state.sold_players.append(player_name)
                                 st.info(f"Marked {player_name} as sold to another team.")
                                 st.rerun()
                         
                         # Add comparison button
-                        compare_key = f"compare_{player_name}_{idx}_{current_page}"
+                        compare_key = f"compare_{pid}"
                         if st.button("Compare", key=compare_key):
                             st.session_state.comparison_player = player_name
                             st.success(f"Added {player_name} to comparison.")
                     
+                    # Show bid modal if this is the current bid player
+                    if st.session_state.current_bid_player == player_name and not player_sold and not player_bought:
+                        try:
+                            max_bid = max_bids[row_id]
+                        except:
+                            max_bid = None
+                        
+                        show_bid_modal(
+                            player_name,
+                            pid,
+                            recommended_price=float(player['Recommended']) if notna['Recommended'] else None,
+                            max_bid=max_bid,
+                            current_budget=st.session_state.remaining_budget,
+                            on_confirm=confirm_bid,
+                            args=(player_name, player),
+                            on_cancel=cancel_bid
+                        )
+                    
                     st.markdown('</div>', unsafe_allow_html=True)
                     
         except Exception as e:
@@ -1478,15 +1610,184 @@ def show_player_search_tab(auction_guide, tab):
             import traceback
             st.code(traceback.format_exc())
 
+# Function to display the team composition charts as a fragment
+@st.fragment
+def render_team_composition():
+    # Create a row of charts
+    chart_cols = st.columns(3)
+    
+    tier_fig, position_fig, gender_fig = build_team_charts(get_team_columns())
+    
+    # Tier distribution, budget by position and gender distribution side by side
+    with chart_cols[0]:
+        st.plotly_chart(tier_fig, use_container_width=True)
+    with chart_cols[1]:
+        st.plotly_chart(position_fig, use_container_width=True)
+    with chart_cols[2]:
+        st.plotly_chart(gender_fig, use_container_width=True)
+
+# Function to display the Optimal Fill picks as a fragment; the solve runs in the background
+# once per team state, and the fragment polls for it while showing the last picks
+@st.fragment(run_every=OPTIMAL_FILL_POLL)
+def render_optimal_fill(affordable_players, remaining_budget, excluded_set, remaining_slots, non_cis_needed):
+    fill_key = (remaining_budget, excluded_set, remaining_slots, non_cis_needed)
+    if st.session_state.get('optimal_fill_key') != fill_key:
+        st.session_state.optimal_fill_key = fill_key
+        st.session_state.optimal_fill_future = get_recommend_pool().submit(
+            recommend_team, affordable_players, remaining_budget, remaining_slots, non_cis_needed
+        )
+    
+    future = st.session_state.optimal_fill_future
+    if future.done():
+        try:
+            st.session_state.optimal_fill_picks = future.result()
+        except Exception:
+            # Clear the key so the next rerun submits the solve again
+            st.session_state.optimal_fill_key = None
+            st.info("Couldn't find the best combination this time; trying again.")
+            return
+    elif 'optimal_fill_picks' in st.session_state:
+        st.caption("Updating…")
+    
+    optimal_picks = st.session_state.get('optimal_fill_picks')
+    if optimal_picks is not None:
+        # Last picks may include players bought or sold since they were found
+        optimal_picks = optimal_picks[~optimal_picks['Player'].isin(list(excluded_set))]
+    
+    if optimal_picks is None:
+        st.info("Finding the best combination of available players…")
+    elif len(optimal_picks) > 0:
+        st.write(f"Total: ₹{optimal_picks['Price'].sum():.1f}M, combined value {optimal_picks['Value_Score'].sum():.2f}")
+        st.dataframe(
+            optimal_picks[['Player', 'Gender', 'Tier', 'Primary_Position', 'Price', 'Value_Score', 'Recommended']],
+            use_container_width=True
+        )
+    else:
+        st.info("No combination of available players fills your remaining slots within budget.")
+
+# Function to display a team builder player card; a fragment, so its widgets
+# rerun only this card unless the team itself changes
+@st.fragment
+def render_player_card(player, auction_guide):
+    player_name = player['Player'] if pd.notna(player['Player']) else "Unknown Player"
+    pid = player['pid']
+    
+    # The grid only lists available players, so a card whose player was just bought or
+    # sold from a callback is stale; refresh the whole app rather than just this card
+    if player_name in st.session_state.team_players_by_name or player_name in st.session_state.sold_players:
+        st.rerun()
+    
+    with st.container():
+        st.markdown(f"### {player_name}")
+        
+        # Player details - enhanced with more information
+        col1, col2 = st.columns(2)
+        with col1:
+            if pd.notna(player['Tier']):
+                try:
+                    tier_value = int(player['Tier'])
+                    st.markdown(f"**Tier:** {tier_value}")
+                except:
+                    st.write("**Tier:** Unknown")
+            
+            gender = player['Gender'] if pd.notna(player['Gender']) else "Not specified"
+            st.write(f"**Gender:** {gender}")
+            
+            position = player['Primary_Position'] if pd.notna(player['Primary_Position']) else "Not specified"
+            st.write(f"**Position:** {position}")
+            
+            if 'APL_Editions' in player and pd.notna(player['APL_Editions']):
+                st.write(f"**APL Editions:** {player['APL_Editions']}")
+            
+            if 'Secondary_Position' in player and pd.notna(player['Secondary_Position']):
+                st.write(f"**Secondary Position:** {player['Secondary_Position']}")
+        
+        with col2:
+            if pd.notna(player['Price']):
+                st.write(f"**Price:** ₹{player['Price']}M")
+            
+            if pd.notna(player['Value_Score']):
+                st.markdown(f"**Value:** {player['Value_Score']:.2f}")
+            
+            if pd.notna(player['Recommended']):
+                st.write(f"**Recommended:** ₹{player['Recommended']}M")
+                
+            if 'Historical_Avg' in player and pd.notna(player['Historical_Avg']):
+                st.write(f"**Historical Avg:** ₹{player['Historical_Avg']:.1f}M")
+                
+            if 'Auction_Score' in player and pd.notna(player['Auction_Score']):
+                st.write(f"**Auction Score:** {player['Auction_Score']:.1f}")
+        
+        # Additional player details if available
+        if ('Bidding_Strategy' in player and pd.notna(player['Bidding_Strategy'])) or \
+           ('Selection_Reason' in player and pd.notna(player['Selection_Reason'])):
+            st.markdown("---")
+            
+            if 'Bidding_Strategy' in player and pd.notna(player['Bidding_Strategy']):
+                st.write(f"**Bidding Strategy:** {player['Bidding_Strategy']}")
+                
+            if 'Selection_Reason' in player and pd.notna(player['Selection_Reason']):
+                st.write(f"**Selection Reason:** {player['Selection_Reason']}")
+        
+        # Action buttons - now in 3 columns to include Mark as Sold
+        st.markdown("---")
+        button_col1, button_col2, button_col3 = st.columns(3)
+        with button_col1:
+            # Add to team button
+            add_key = f"add_team_{pid}"
+            if st.button("Add to Team", key=add_key, on_click=add_to_team, args=(player_name, player)):
+                # add_to_team leaves the card in place only when the player is unaffordable
+                st.error(f"Not enough budget to add this player (₹{player['Price']}M)!")
+        
+        with button_col2:
+            # Bid button
+            bid_key = f"bid_team_{pid}"
+            st.button("Bid", key=bid_key, on_click=start_bid, args=(player_name,))
+        
+        with button_col3:
+            # Mark as Sold button
+            sold_key = f"sold_team_{pid}"
+            st.button("Mark as Sold", key=sold_key, on_click=mark_sold, args=(player_name,))
+            
+        # Show bid modal if this is the current bid player
+        if st.session_state.current_bid_player == player_name:
+            # Get values for the bid modal
+            recommended = float(player['Recommended']) if pd.notna(player['Recommended']) else None
+            
+            try:
+                max_bid = compute_max_bids(
+                    auction_guide, id(auction_guide), st.session_state.remaining_budget,
+                    st.session_state.players_needed, BID_STRATEGY
+                )[player.name]
+            except:
+                max_bid = None
+            
+            # Show bid modal; it reruns the app itself once the bid is confirmed or cancelled
+            show_bid_modal(
+                player_name, 
+                pid,
+                recommended_price=recommended, 
+                max_bid=max_bid,
+                current_budget=st.session_state.remaining_budget,
+                on_confirm=confirm_bid,
+                args=(player_name, player),
+                on_cancel=cancel_bid
+            )
+        
+        st.markdown("---")
+
 # Function to display team builder tab
 def show_team_builder_tab(tab, auction_guide):
     with tab:
         st.header("Team Builder")
         
+        # Team frame built once and shared by every section below
+        team_df = get_team_df() if st.session_state.team_players_by_name else None
+        
         # Budget summary at the very top
-        total_team_price = sum([p.get('Final_Price', p.get('Price', 0)) for p in st.session_state.team_players])
+        total_team_price = st.session_state.spent
         remaining_budget = st.session_state.remaining_budget
-        players_needed = TEAM_SIZE - len(st.session_state.team_players)
+        players_needed = st.session_state.players_needed
         avg_per_player = remaining_budget / players_needed if players_needed > 0 else 0
         
         # Display budget metrics in a prominent way at the top
@@ -1503,25 +1804,25 @@ def show_team_builder_tab(tab, auction_guide):
         # Team summary and budget in a single column layout
         st.subheader("Current Team")
         
-        if len(st.session_state.team_players) == 0:
+        if team_df is None:
             st.info("No players added to your team yet.")
         else:
-            # Team table
-            team_df = pd.DataFrame(st.session_state.team_players)
-            
             # Calculate stats
             avg_team_value = team_df['Value_Score'].mean()
-            non_cis_count = len(team_df[team_df['Gender'] == 'Women'])
+            non_cis_count = int((team_df['Gender'] == NON_CIS_GENDER).sum())
             
             # Display team table with sortable columns and bid information
             if 'Bid' in team_df.columns and 'Final_Price' in team_df.columns:
                 # Create a better display format with bid information
                 display_df = team_df.copy()
                 # Format bid and final price for display
-                display_df['Price Info'] = display_df.apply(
-                    lambda row: f"₹{row['Final_Price']}M (Bid: ₹{row['Bid']}M)" if pd.notna(row['Bid']) else f"₹{row['Price']}M", 
-                    axis=1
-                )
+                bid = display_df['Bid'].to_numpy()
+                final = display_df['Final_Price'].to_numpy()
+                price = display_df['Price'].to_numpy()
+                has_bid = pd.notna(bid)
+                with_bid = np.char.add(np.char.add("₹", final.astype(str)), np.char.add("M (Bid: ₹", np.char.add(bid.astype(str), "M)")))
+                no_bid = np.char.add("₹", np.char.add(price.astype(str), "M"))
+                display_df['Price Info'] = np.where(has_bid, with_bid, no_bid)
                 # Select columns to display
                 display_cols = ['Player', 'Tier', 'Position', 'Gender', 'Value_Score', 'Price Info']
                 display_df = display_df[display_cols] if all(col in display_df.columns for col in display_cols) else display_df
@@ -1553,8 +1854,7 @@ def show_team_builder_tab(tab, auction_guide):
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Reset Team", key="reset_team_builder"):
-                st.session_state.team_players = []
-                st.session_state.remaining_budget = TOTAL_BUDGET
+                reset_team()
                 st.success("Team reset successfully.")
                 st.rerun()
         
@@ -1591,37 +1891,25 @@ def show_team_builder_tab(tab, auction_guide):
                 gender_options += sorted(auction_guide["Gender"].dropna().unique().tolist())
             gender_filter = st.selectbox("Gender", gender_options, key="team_builder_gender")
         
-        # Search results
-        if search_query or search_button:
-            # Filter available players
-            filtered_players = auction_guide.copy()
-            
-            # Apply search filter
-            if search_query:
-                filtered_players = filtered_players[filtered_players["Player"].str.contains(search_query, case=False, na=False)]
+        # Search results - only scan the guide once there is a query to match
+        if search_query:
+            # Build a single composite mask instead of slicing a copy per filter
+            mask = auction_guide["Player"].str.contains(search_query, case=False, na=False)
             
             # Apply other filters
-            if position_filter != "All" and 'Primary_Position' in filtered_players.columns:
-                filtered_players = filtered_players[
-                    (filtered_players["Primary_Position"].str.contains(position_filter, case=False, na=False)) | 
-                    (filtered_players["Primary_Position"].isna() & (position_filter == "All"))
-                ]
+            if position_filter != "All" and 'Primary_Position' in auction_guide.columns:
+                mask &= auction_guide["Primary_Position"].str.contains(position_filter, case=False, na=False)
             
-            if tier_filter != "All" and 'Tier' in filtered_players.columns:
-                filtered_players = filtered_players[
-                    (filtered_players["Tier"] == tier_filter) | 
-                    (filtered_players["Tier"].isna() & (tier_filter == "All"))
-                ]
+            if tier_filter != "All" and 'Tier' in auction_guide.columns:
+                mask &= auction_guide["Tier"] == tier_filter
             
-            if gender_filter != "All" and 'Gender' in filtered_players.columns:
-                filtered_players = filtered_players[
-                    (filtered_players["Gender"] == gender_filter) | 
-                    (filtered_players["Gender"].isna() & (gender_filter == "All"))
-                ]
+            if gender_filter != "All" and 'Gender' in auction_guide.columns:
+                mask &= auction_guide["Gender"] == gender_filter
             
             # Show only available players (not in sold list or team)
-            existing_players = [p['Player'] for p in st.session_state.team_players]
-            filtered_players = filtered_players[~filtered_players["Player"].isin(st.session_state.sold_players + existing_players)]
+            excluded_players = set(st.session_state.sold_players) | set(st.session_state.team_players_by_name)
+            mask &= ~auction_guide["Player"].isin(excluded_players)
+            filtered_players = auction_guide.loc[mask]
             
             # Display search results
             if not filtered_players.empty:
@@ -1638,172 +1926,9 @@ def show_team_builder_tab(tab, auction_guide):
                         idx = i + j
                         if idx < len(display_players):
                             player = display_players.iloc[idx]
-                            player_name = player['Player'] if pd.notna(player['Player']) else "Unknown Player"
                             
                             with row_cols[j]:
-                                with st.container():
-                                    st.markdown(f"### {player_name}")
-                                    
-                                    # Player details - enhanced with more information
-                                    col1, col2 = st.columns(2)
-                                    with col1:
-                                        if pd.notna(player['Tier']):
-                                            try:
-                                                tier_value = int(player['Tier'])
-                                                st.markdown(f"**Tier:** {tier_value}")
-                                            except:
-                                                st.write("**Tier:** Unknown")
-                                        
-                                        gender = player['Gender'] if pd.notna(player['Gender']) else "Not specified"
-                                        st.write(f"**Gender:** {gender}")
-                                        
-                                        position = player['Primary_Position'] if pd.notna(player['Primary_Position']) else "Not specified"
-                                        st.write(f"**Position:** {position}")
-                                        
-                                        if 'APL_Editions' in player and pd.notna(player['APL_Editions']):
-                                            st.write(f"**APL Editions:** {player['APL_Editions']}")
-                                        
-                                        if 'Secondary_Position' in player and pd.notna(player['Secondary_Position']):
-                                            st.write(f"**Secondary Position:** {player['Secondary_Position']}")
-                                    
-                                    with col2:
-                                        if pd.notna(player['Price']):
-                                            st.write(f"**Price:** ₹{player['Price']}M")
-                                        
-                                        if pd.notna(player['Value_Score']):
-                                            value_class = get_value_class(player['Value_Score'])
-                                            st.markdown(f"**Value:** {player['Value_Score']:.2f}")
-                                        
-                                        if pd.notna(player['Recommended']):
-                                            st.write(f"**Recommended:** ₹{player['Recommended']}M")
-                                            
-                                        if 'Historical_Avg' in player and pd.notna(player['Historical_Avg']):
-                                            st.write(f"**Historical Avg:** ₹{player['Historical_Avg']}M")
-                                            
-                                        if 'Auction_Score' in player and pd.notna(player['Auction_Score']):
-                                            st.write(f"**Auction Score:** {player['Auction_Score']}")
-                                    
-                                    # Additional player details if available
-                                    if ('Bidding_Strategy' in player and pd.notna(player['Bidding_Strategy'])) or \
-                                       ('Selection_Reason' in player and pd.notna(player['Selection_Reason'])):
-                                        st.markdown("---")
-                                        
-                                        if 'Bidding_Strategy' in player and pd.notna(player['Bidding_Strategy']):
-                                            st.write(f"**Bidding Strategy:** {player['Bidding_Strategy']}")
-                                            
-                                        if 'Selection_Reason' in player and pd.notna(player['Selection_Reason']):
-                                            st.write(f"**Selection Reason:** {player['Selection_Reason']}")
-                                    
-                                    # Action buttons - now in 3 columns to include Mark as Sold
-                                    st.markdown("---")
-                                    button_col1, button_col2, button_col3 = st.columns(3)
-                                    with button_col1:
-                                        # Add to team button
-                                        add_key = f"add_team_{player_name}_{idx}"
-                                        if st.button("Add to Team", key=add_key):
-                                            # Get default values for required fields
-                                            player_price = float(player['Price']) if pd.notna(player['Price']) else 0
-                                            player_tier = int(player['Tier']) if pd.notna(player['Tier']) else 4
-                                            player_gender = player['Gender'] if pd.notna(player['Gender']) else "Not specified"
-                                            player_position = player['Primary_Position'] if pd.notna(player['Primary_Position']) else "Not specified"
-                                            player_value = float(player['Value_Score']) if pd.notna(player['Value_Score']) else 1.0
-                                            
-                                            # Check if we can afford the player
-                                            if player_price <= st.session_state.remaining_budget:
-                                                st.session_state.team_players.append({
-                                                    'Player': player_name,
-                                                    'Tier': player_tier,
-                                                    'Price': player_price,
-                                                    'Gender': player_gender,
-                                                    'Position': player_position,
-                                                    'Value_Score': player_value,
-                                                    'Bid': None,
-                                                    'Final_Price': player_price
-                                                })
-                                                st.session_state.remaining_budget -= player_price
-                                                st.success(f"Added {player_name} to your team!")
-                                                st.rerun()
-                                            else:
-                                                st.error(f"Not enough budget to add this player (₹{player_price}M)!")
-                                    
-                                    with button_col2:
-                                        # Bid button
-                                        bid_key = f"bid_team_{player_name}_{idx}"
-                                        if st.button("Bid", key=bid_key):
-                                            st.session_state.current_bid_player = player_name
-                                            st.rerun()
-                                    
-                                    with button_col3:
-                                        # Mark as Sold button
-                                        sold_key = f"sold_team_{player_name}_{idx}"
-                                        if st.button("Mark as Sold", key=sold_key):
-                                            st.session_state.sold_players.append(player_name)
-                                            st.info(f"Marked {player_name} as sold to another team.")
-                                            st.rerun()
-                                        
-                                    # Show bid modal if this is the current bid player
-                                    if st.session_state.current_bid_player == player_name:
-                                        # Get values for the bid modal
-                                        recommended = float(player['Recommended']) if pd.notna(player['Recommended']) else None
-                                        value_score = float(player['Value_Score']) if pd.notna(player['Value_Score']) else 1.0
-                                        is_high_priority = (player['Auction_Priority'] == "High") if pd.notna(player['Auction_Priority']) and 'Auction_Priority' in player else False
-                                        
-                                        try:
-                                            max_bid = calculate_max_bid(st.session_state.remaining_budget, 
-                                                                     TEAM_SIZE - len(st.session_state.team_players), 
-                                                                     value_score, is_high_priority)
-                                        except:
-                                            max_bid = None
-                                        
-                                        # Show bid modal and get result
-                                        bid_result = show_bid_modal(
-                                            player_name, 
-                                            recommended_price=recommended, 
-                                            max_bid=max_bid,
-                                            current_budget=st.session_state.remaining_budget
-                                        )
-                                        
-                                        # Process bid result
-                                        if bid_result["action"] == "confirm":
-                                            # Get default values for required fields
-                                            player_price = float(player['Price']) if pd.notna(player['Price']) else 0
-                                            player_tier = int(player['Tier']) if pd.notna(player['Tier']) else 4
-                                            player_gender = player['Gender'] if pd.notna(player['Gender']) else "Not specified"
-                                            player_position = player['Primary_Position'] if pd.notna(player['Primary_Position']) else "Not specified"
-                                            player_value = float(player['Value_Score']) if pd.notna(player['Value_Score']) else 1.0
-                                            
-                                            # Check if we can afford the player
-                                            if bid_result["final_price"] <= st.session_state.remaining_budget:
-                                                # Add to team with bid information
-                                                st.session_state.team_players.append({
-                                                    'Player': player_name,
-                                                    'Tier': player_tier,
-                                                    'Price': player_price,
-                                                    'Gender': player_gender,
-                                                    'Position': player_position,
-                                                    'Value_Score': player_value,
-                                                    'Bid': bid_result["bid"],
-                                                    'Final_Price': bid_result["final_price"]
-                                                })
-                                                # Update budget based on final price
-                                                st.session_state.remaining_budget -= bid_result["final_price"]
-                                                # Add to bid history
-                                                st.session_state.bid_history[player_name] = {
-                                                    'bid': bid_result["bid"],
-                                                    'final_price': bid_result["final_price"]
-                                                }
-                                                # Clear current bid player
-                                                st.session_state.current_bid_player = None
-                                                st.success(f"Successfully bid ₹{bid_result['bid']}M and acquired {player_name} for ₹{bid_result['final_price']}M!")
-                                                st.rerun()
-                                            else:
-                                                st.error(f"Not enough budget to pay ₹{bid_result['final_price']}M for this player!")
-                                        elif bid_result["action"] == "cancel":
-                                            # Clear current bid player
-                                            st.session_state.current_bid_player = None
-                                            st.rerun()
-                                    
-                                    st.markdown("---")
+                                render_player_card(player, auction_guide)
             else:
                 st.info("No players found matching your search criteria.")
         
@@ -1811,73 +1936,8 @@ def show_team_builder_tab(tab, auction_guide):
         st.markdown("---")
         st.subheader("Team Composition")
         
-        if len(st.session_state.team_players) > 0:
-            team_df = pd.DataFrame(st.session_state.team_players)
-            
-            # Create a row of charts
-            chart_cols = st.columns(3)
-            
-            # Tier distribution pie chart in first column
-            with chart_cols[0]:
-                tier_counts = team_df['Tier'].value_counts().reset_index()
-                tier_counts.columns = ['Tier', 'Count']
-                
-                fig = px.pie(
-                    tier_counts, 
-                    values='Count', 
-                    names='Tier', 
-                    title='Players by Tier',
-                    color='Tier',
-                    color_discrete_map={
-                        1: '#FF9800',
-                        2: '#2196F3',
-                        3: '#4CAF50',
-                        4: '#9C27B0'
-                    }
-                )
-                fig.update_traces(textinfo='percent+label')
-                fig.update_layout(height=250)
-                st.plotly_chart(fig, use_container_width=True)
-            
-            # Budget allocation by position in second column
-            with chart_cols[1]:
-                if 'Position' in team_df.columns:
-                    # Get actual price paid (final price or regular price)
-                    team_df['Actual_Price'] = team_df.apply(
-                        lambda row: row.get('Final_Price', row.get('Price', 0)), 
-                        axis=1
-                    )
-                    position_budget = team_df.groupby('Position')['Actual_Price'].sum().reset_index()
-                    position_budget = position_budget.sort_values('Actual_Price', ascending=False)
-                    
-                    fig = px.bar(
-                        position_budget,
-                        x='Position',
-                        y='Actual_Price',
-                        title='Budget by Position (₹M)',
-                        color='Position',
-                    )
-                    fig.update_layout(height=250)
-                    st.plotly_chart(fig, use_container_width=True)
-            
-            # Gender distribution in third column
-            with chart_cols[2]:
-                gender_counts = team_df['Gender'].value_counts().reset_index()
-                gender_counts.columns = ['Gender', 'Count']
-                
-                fig = px.bar(
-                    gender_counts,
-                    x='Gender',
-                    y='Count',
-                    title='Gender Distribution',
-                    color='Gender',
-                    color_discrete_map={
-                        'Men': '#2196F3',
-                        'Women': '#E91E63'
-                    }
-                )
-                fig.update_layout(height=250)
-                st.plotly_chart(fig, use_container_width=True)
+        if team_df is not None:
+            render_team_composition()
         else:
             st.info("Add players to see team composition.")
         
@@ -1885,20 +1945,24 @@ def show_team_builder_tab(tab, auction_guide):
         st.markdown("---")
         st.subheader("Team Optimization Suggestions")
         
-        if len(st.session_state.team_players) > 0:
-            team_df = pd.DataFrame(st.session_state.team_players)
+        if team_df is not None:
             remaining_budget = st.session_state.remaining_budget
             remaining_slots = TEAM_SIZE - len(team_df)
-            non_cis_count = len(team_df[team_df['Gender'] == 'Women'])
+            non_cis_count = int((team_df['Gender'] == NON_CIS_GENDER).sum())
             non_cis_needed = max(0, MIN_NON_CIS - non_cis_count)
             
+            # Players that can't be recommended, computed once for every filter below
+            taken_set = frozenset(st.session_state.team_players_by_name)
+            sold_set = frozenset(st.session_state.sold_players)
+            excluded_set = taken_set | sold_set
+            
             # Team balance analysis
             st.markdown("### Team Balance Analysis")
             
             # Position analysis if we have position data
             if 'Position' in team_df.columns:
                 # Count players by position
-                position_counts = team_df['Position'].value_counts().to_dict()
+                position_counts = st.session_state.position_counts
                 
                 # Define ideal counts
                 ideal_counts = {
@@ -1924,18 +1988,18 @@ def show_team_builder_tab(tab, auction_guide):
             if remaining_slots > 0:
                 st.write(f"You need {remaining_slots} more players with ₹{remaining_budget:.1f}M remaining (₹{remaining_budget/remaining_slots:.1f}M per player).")
                 
+                # Available players within budget, sorted by value - shared by every suggestion below
+                affordable_players = get_affordable(
+                    auction_guide, id(auction_guide), remaining_budget, excluded_set
+                )
+                
                 # Gender requirement suggestion
                 if non_cis_needed > 0:
                     st.warning(f"⚠️ **Priority Alert:** You need {non_cis_needed} more non-cis players to meet the requirement.")
                     
                     # Get top non-cis players within budget
                     avg_budget_per_player = remaining_budget / remaining_slots
-                    affordable_non_cis = auction_guide[
-                        (auction_guide['Gender'] == 'Women') & 
-                        (auction_guide['Price'] <= remaining_budget) &
-                        (~auction_guide['Player'].isin([p['Player'] for p in st.session_state.team_players])) &
-                        (~auction_guide['Player'].isin(st.session_state.sold_players))
-                    ].sort_values('Value_Score', ascending=False)
+                    affordable_non_cis = affordable_players[affordable_players['Gender'] == NON_CIS_GENDER]
                     
                     if len(affordable_non_cis) > 0:
                         st.markdown("#### Top Non-CIS Recommendations:")
@@ -1956,15 +2020,9 @@ def show_team_builder_tab(tab, auction_guide):
                 # Best value picks with remaining budget
                 st.subheader("Best Available Players Within Budget")
                 
-                affordable_players = auction_guide[
-                    (auction_guide['Price'] <= remaining_budget) &
-                    (~auction_guide['Player'].isin([p['Player'] for p in st.session_state.team_players])) &
-                    (~auction_guide['Player'].isin(st.session_state.sold_players))
-                ].sort_values('Value_Score', ascending=False)
-                
                 if len(affordable_players) > 0:
                     # Create tabs for different recommendation types
-                    pick_tabs = st.tabs(["Best Value", "Budget Picks", "Premium Options"])
+                    pick_tabs = st.tabs(["Best Value", "Budget Picks", "Premium Options", "Optimal Fill"])
                     
                     with pick_tabs[0]:
                         # Best value regardless of price
@@ -1975,8 +2033,8 @@ def show_team_builder_tab(tab, auction_guide):
                         )
                     
                     with pick_tabs[1]:
-                        # Budget picks (lower price)
-                        budget_picks = affordable_players[affordable_players['Price'] <= remaining_budget/remaining_slots].sort_values('Value_Score', ascending=False).head(5)
+                        # Budget picks (lower price); masking keeps the value order of affordable_players
+                        budget_picks = affordable_players[affordable_players['Price'] <= remaining_budget/remaining_slots].head(5)
                         st.dataframe(
                             budget_picks[['Player', 'Gender', 'Tier', 'Primary_Position', 'Price', 'Value_Score', 'Recommended']],
                             use_container_width=True
@@ -1984,11 +2042,15 @@ def show_team_builder_tab(tab, auction_guide):
                         
                     with pick_tabs[2]:
                         # Premium options (higher price)
-                        premium_picks = affordable_players[affordable_players['Tier'] <= 2].sort_values('Value_Score', ascending=False).head(5)
+                        premium_picks = affordable_players[affordable_players['Tier'] <= 2].head(5)
                         st.dataframe(
                             premium_picks[['Player', 'Gender', 'Tier', 'Primary_Position', 'Price', 'Value_Score', 'Recommended']],
                             use_container_width=True
                         )
+                    
+                    with pick_tabs[3]:
+                        # Best total value for every remaining slot at once, including the non-cis requirement
+                        render_optimal_fill(affordable_players, remaining_budget, excluded_set, remaining_slots, non_cis_needed)
                         
                     # Button to view all affordable players
                     if st.button("View All Affordable Players"):
@@ -2004,7 +2066,6 @@ def show_team_builder_tab(tab, auction_guide):
                 st.success("✅ Your team is complete!")
                 
                 # Team quality assessment
-                team_df = pd.DataFrame(st.session_state.team_players)
                 avg_value = team_df['Value_Score'].mean()
                 value_rating = "Excellent" if avg_value >= 1.5 else "Good" if avg_value >= 1.2 else "Average" if avg_value >= 1.0 else "Poor"
                 
@@ -2028,268 +2089,284 @@ def show_team_builder_tab(tab, auction_guide):
                     st.write("Consider replacing a male player with a female player:")
                     
                     # Get male players in team
-                    male_players = team_df[team_df['Gender'] == 'Men']
+                    male_players = team_df[team_df['Gender'] == MAN_GENDER]
                     
-                    # Get affordable female players
-                    for _, male_player in male_players.iterrows():
-                        budget_with_swap = remaining_budget + male_player['Price']
-                        
-                        affordable_females = auction_guide[
-                            (auction_guide['Gender'] == 'Women') & 
-                            (auction_guide['Price'] <= budget_with_swap) &
-                            (~auction_guide['Player'].isin([p['Player'] for p in st.session_state.team_players])) &
-                            (~auction_guide['Player'].isin(st.session_state.sold_players))
-                        ].sort_values('Value_Score', ascending=False)
-                        
-                        if len(affordable_females) > 0:
-                            st.write(f"Replace {male_player['Player']} (₹{male_player['Price']}M) with:")
-                            for _, female_player in affordable_females.head(2).iterrows():
-                                net_change = female_player['Price'] - male_player['Price']
-                                st.write(f"- {female_player['Player']} (Tier {int(female_player['Tier'])}) - ₹{female_player['Price']}M, Net Budget Change: ₹{net_change:.1f}M")
+                    # Get female players affordable with the most expensive swap, then order
+                    # them by price so each male player's budget is a binary search away
+                    if not male_players.empty:
+                        eligible_females = get_affordable(
+                            auction_guide, id(auction_guide), remaining_budget + male_players['Price'].max(),
+                            excluded_set, gender=NON_CIS_GENDER
+                        )
+                        price_order = np.argsort(eligible_females['Price'].to_numpy(), kind='stable')
+                        female_prices = eligible_females['Price'].to_numpy()[price_order]
                         
-                        if len(affordable_females) == 0:
-                            st.write(f"No affordable female players found to replace {male_player['Player']} (₹{male_player['Price']}M)")
+                        # Get affordable female players
+                        for male_price, male_name in zip(male_players['Price'].values, male_players['Player'].values):
+                            n_affordable = np.searchsorted(female_prices, remaining_budget + male_price, side='right')
+                            
+                            if n_affordable > 0:
+                                # Lowest positions in the value-sorted list are the best value picks
+                                best_females = eligible_females.iloc[np.sort(price_order[:n_affordable])[:2]]
+                                st.write(f"Replace {male_name} (₹{male_price}M) with:")
+                                for female_name, female_tier, female_price in zip(
+                                    best_females['Player'].values, best_females['Tier'].values, best_females['Price'].values
+                                ):
+                                    net_change = female_price - male_price
+                                    st.write(f"- {female_name} (Tier {int(female_tier)}) - ₹{female_price}M, Net Budget Change: ₹{net_change:.1f}M")
+                            else:
+                                st.write(f"No affordable female players found to replace {male_name} (₹{male_price}M)")
         else:
             st.info("Add players to your team to see optimization suggestions.")
 
+# Info tab text, built once at import rather than on every rerun of the tab
+INFO_INTRO_MD = """
+## Understanding Auction Metrics
+
+This comprehensive guide explains how all key metrics and scores are calculated
+for the APL 8 auction. Use this information to make more informed decisions about
+player valuation and team building.
+"""
+
+INFO_SECTIONS_MD = {
+    "Value Score": """
+# Value Score Explained
+
+## What is Value Score?
+
+The Value Score is a metric ranging from 0 to 3+ that indicates how much value a player provides at their price point.
+This is the most important metric for auction strategy as it helps identify undervalued players.
+
+## Score Interpretation
+
+- **Excellent Value (≥2.0)**: Player is significantly underpriced and provides exceptional value
+- **Good Value (1.5-1.99)**: Player is underpriced and provides above-average value
+- **Fair Value (1.0-1.49)**: Player is appropriately priced
+- **Poor Value (<1.0)**: Player is overpriced relative to their expected contribution
+
+## Calculation Formula
+
+```
+Value_Score = (Player_Adjusted_Rating / Player_Price) × Price_Scaling_Factor
+```
+
+Where:
+- **Player_Adjusted_Rating**: A composite score based on:
+  - Historical performance in previous APL editions
+  - Performance consistency across editions
+  - Tier rating (inherent skill level)
+  - Positional impact assessment
+
+- **Price_Scaling_Factor**: Adjusts for the different price ranges across tiers:
+  - Tier 1: 1.0x
+  - Tier 2: 1.2x
+  - Tier 3: 1.4x
+  - Tier 4: 1.6x
+
+This scaling acknowledges that lower tier players are expected to provide less absolute value,
+but can still be valuable relative to their lower price points.
+
+## Example Calculation
+
+For a Tier 3 player with:
+- Adjusted Rating: 30
+- Price: ₹20M
+- Tier Scaling Factor: 1.4
+
+```
+Value_Score = (30 / 20) × 1.4 = 2.1
+```
+
+This would be considered an excellent value at 2.1.
+""",
+    "Auction Score": """
+# Auction Score Explained
+
+## What is Auction Score?
+
+The Auction Score is a comprehensive rating from 0-10 that combines multiple factors to indicate 
+a player's overall desirability during an auction. It helps prioritize players when making bidding decisions.
+
+## Score Components
+
+The Auction Score is calculated as a weighted combination of:
+
+1. **Value Score (40%)**: The player's value rating
+2. **Player Quality (25%)**: Absolute player skill level (primarily based on tier)
+3. **Team Fit (15%)**: How well the player matches positional needs
+4. **Historical Consistency (10%)**: Reliability across APL editions
+5. **Budget Fit (10%)**: How well the player fits within budget constraints
+
+## Formula Breakdown
+
+```
+Auction_Score = (0.4 × Value_Component) + 
+               (0.25 × Quality_Component) + 
+               (0.15 × Team_Fit_Component) + 
+               (0.1 × Historical_Component) + 
+               (0.1 × Budget_Component)
+```
+
+Each component is normalized to a 0-10 scale before being combined.
+
+## Example Interpretation
+
+- **8-10**: Must-have players, worth aggressive bidding
+- **6-8**: Strong targets, bid confidently up to recommended price
+- **4-6**: Solid options, good value at or below recommended price
+- **2-4**: Consider only if price falls well below recommendations
+- **0-2**: Avoid unless extremely underpriced
+""",
+    "Price Calculations": """
+# Price Calculations
+
+## Historical Average Price
+
+The historical average price is calculated from previous APL editions where the player participated:
+
+```
+Historical_Avg = Sum of prices across APL editions / Number of editions
+```
+
+## Recommended Price
+
+The recommended price builds on historical average with adjustments:
+
+```
+Recommended_Price = Historical_Avg × Value_Factor × Inflation_Adjustment
+```
+
+Where:
+- **Value_Factor**: Adjustment based on performance trend (0.8-1.2)
+- **Inflation_Adjustment**: APL price inflation factor (1.1 for this edition)
+
+For new players without historical data:
+```
+Recommended_Price = Tier_Base_Price × Performance_Adjustment
+```
+
+Where tier base prices are:
+- Tier 1: ₹75M
+- Tier 2: ₹40M
+- Tier 3: ₹15M
+- Tier 4: ₹5M
+
+## Maximum Bid Calculation
+
+The maximum bid calculation is dynamic based on team needs:
+
+```
+Max_Bid = (Remaining_Budget / Players_Needed) × Value_Adjustment
+```
+
+Where Value_Adjustment is:
+- For high priority players: 1.5 + (Value_Score - 1) × 0.5
+- For other players: 1 + (Value_Score - 1) × 0.3
+
+This ensures you can bid more aggressively on high-value players while maintaining budget discipline.
+""",
+    "Team Building": """
+# Team Building Guidelines
+
+## Team Composition Requirements
+
+- **Total Players**: 10 players per team
+- **Gender Requirement**: Minimum 2 non-CIS (women) players
+- **Budget**: ₹150M total
+
+## Recommended Position Distribution
+
+- **Forwards**: 3 players (30-40% of budget)
+- **Midfielders**: 3 players (25-35% of budget)
+- **Defenders**: 3 players (15-25% of budget)
+- **Goalkeeper**: 1 player (5-15% of budget)
+
+## Tier Distribution Strategies
+
+### Balanced Approach
+- 1-2 Tier 1 players
+- 2-3 Tier 2 players
+- 3-4 Tier 3 players
+- 2-3 Tier 4 players
+
+### Star Power Approach
+- 2-3 Tier 1 players
+- 1-2 Tier 2 players
+- 2-3 Tier 3 players
+- 3-4 Tier 4 players
+
+### Value Maximization Approach
+- 0-1 Tier 1 players
+- 3-4 Tier 2 players
+- 4-5 Tier 3 players
+- 1-2 Tier 4 players
+
+## Budget Allocation Principles
+
+1. **Core vs. Support**: Allocate 60-70% to core players (4-5 players)
+2. **Positional Weighting**: Premium on forwards and creative midfielders
+3. **Value Targeting**: Prioritize players with Value Score > 1.5
+4. **Reserve Flexibility**: Keep 5-10% in reserve for opportunities
+""",
+    "Glossary": """
+# Glossary of Terms
+
+## Player Categories
+
+- **Tier**: Fundamental skill classification (1-4, with 1 being highest)
+- **Primary Position**: Player's main playing position
+- **Secondary Position**: Alternative position capability
+- **Gender**: Men or Women (minimum 2 women required per team)
+
+## Value Metrics
+
+- **Value Score**: Measure of player's value relative to price (higher is better)
+- **Auction Score**: Overall auction desirability on 0-10 scale
+- **Auction Priority**: High/Medium/Low classification for auction targeting
+
+## Price Components
+
+- **Price**: Listed auction price in millions (₹M)
+- **Historical Average**: Average price from previous APL editions
+- **Recommended Price**: Suggested maximum bid amount
+- **Maximum Bid**: Dynamic calculation of highest justifiable bid based on team situation
+
+## Strategic Terms
+
+- **Bidding Strategy**: Specific auction approach for each player
+- **Selection Reason**: Justification for player's inclusion in top picks
+- **Value Tier**: Classification based on Value Score (Excellent/Good/Fair/Poor)
+- **Budget Fit**: How well a player fits within remaining team budget
+""",
+}
+
 # Function to display info tab with detailed metrics explanation
 def show_info_tab(tab):
     with tab:
         st.header("APL Auction Metrics Guide")
         
-        st.markdown("""
-        ## Understanding Auction Metrics
-        
-        This comprehensive guide explains how all key metrics and scores are calculated
-        for the APL 8 auction. Use this information to make more informed decisions about
-        player valuation and team building.
-        """)
+        st.markdown(INFO_INTRO_MD)
         
         # Create tabs for different metric categories
-        metric_tabs = st.tabs(["Value Score", "Auction Score", "Price Calculations", "Team Building", "Glossary"])
+        metric_tabs = st.tabs(list(INFO_SECTIONS_MD))
         
-        with metric_tabs[0]:
-            st.markdown("""
-            # Value Score Explained
-            
-            ## What is Value Score?
-            
-            The Value Score is a metric ranging from 0 to 3+ that indicates how much value a player provides at their price point.
-            This is the most important metric for auction strategy as it helps identify undervalued players.
-            
-            ## Score Interpretation
-            
-            - **Excellent Value (≥2.0)**: Player is significantly underpriced and provides exceptional value
-            - **Good Value (1.5-1.99)**: Player is underpriced and provides above-average value
-            - **Fair Value (1.0-1.49)**: Player is appropriately priced
-            - **Poor Value (<1.0)**: Player is overpriced relative to their expected contribution
-            
-            ## Calculation Formula
-            
-            ```
-            Value_Score = (Player_Adjusted_Rating / Player_Price) × Price_Scaling_Factor
-            ```
-            
-            Where:
-            - **Player_Adjusted_Rating**: A composite score based on:
-              - Historical performance in previous APL editions
-              - Performance consistency across editions
-              - Tier rating (inherent skill level)
-              - Positional impact assessment
-            
-            - **Price_Scaling_Factor**: Adjusts for the different price ranges across tiers:
-              - Tier 1: 1.0x
-              - Tier 2: 1.2x
-              - Tier 3: 1.4x
-              - Tier 4: 1.6x
-            
-            This scaling acknowledges that lower tier players are expected to provide less absolute value,
-            but can still be valuable relative to their lower price points.
-            
-            ## Example Calculation
-            
-            For a Tier 3 player with:
-            - Adjusted Rating: 30
-            - Price: ₹20M
-            - Tier Scaling Factor: 1.4
-            
-            ```
-            Value_Score = (30 / 20) × 1.4 = 2.1
-            ```
-            
-            This would be considered an excellent value at 2.1.
-            """)
-            
-        with metric_tabs[1]:
-            st.markdown("""
-            # Auction Score Explained
-            
-            ## What is Auction Score?
-            
-            The Auction Score is a comprehensive rating from 0-10 that combines multiple factors to indicate 
-            a player's overall desirability during an auction. It helps prioritize players when making bidding decisions.
-            
-            ## Score Components
-            
-            The Auction Score is calculated as a weighted combination of:
-            
-            1. **Value Score (40%)**: The player's value rating
-            2. **Player Quality (25%)**: Absolute player skill level (primarily based on tier)
-            3. **Team Fit (15%)**: How well the player matches positional needs
-            4. **Historical Consistency (10%)**: Reliability across APL editions
-            5. **Budget Fit (10%)**: How well the player fits within budget constraints
-            
-            ## Formula Breakdown
-            
-            ```
-            Auction_Score = (0.4 × Value_Component) + 
-                           (0.25 × Quality_Component) + 
-                           (0.15 × Team_Fit_Component) + 
-                           (0.1 × Historical_Component) + 
-                           (0.1 × Budget_Component)
-            ```
-            
-            Each component is normalized to a 0-10 scale before being combined.
-            
-            ## Example Interpretation
-            
-            - **8-10**: Must-have players, worth aggressive bidding
-            - **6-8**: Strong targets, bid confidently up to recommended price
-            - **4-6**: Solid options, good value at or below recommended price
-            - **2-4**: Consider only if price falls well below recommendations
-            - **0-2**: Avoid unless extremely underpriced
-            """)
-            
-        with metric_tabs[2]:
-            st.markdown("""
-            # Price Calculations
-            
-            ## Historical Average Price
-            
-            The historical average price is calculated from previous APL editions where the player participated:
-            
-            ```
-            Historical_Avg = Sum of prices across APL editions / Number of editions
-            ```
-            
-            ## Recommended Price
-            
-            The recommended price builds on historical average with adjustments:
-            
-            ```
-            Recommended_Price = Historical_Avg × Value_Factor × Inflation_Adjustment
-            ```
-            
-            Where:
-            - **Value_Factor**: Adjustment based on performance trend (0.8-1.2)
-            - **Inflation_Adjustment**: APL price inflation factor (1.1 for this edition)
-            
-            For new players without historical data:
-            ```
-            Recommended_Price = Tier_Base_Price × Performance_Adjustment
-            ```
-            
-            Where tier base prices are:
-            - Tier 1: ₹75M
-            - Tier 2: ₹40M
-            - Tier 3: ₹15M
-            - Tier 4: ₹5M
-            
-            ## Maximum Bid Calculation
-            
-            The maximum bid calculation is dynamic based on team needs:
-            
-            ```
-            Max_Bid = (Remaining_Budget / Players_Needed) × Value_Adjustment
-            ```
-            
-            Where Value_Adjustment is:
-            - For high priority players: 1.5 + (Value_Score - 1) × 0.5
-            - For other players: 1 + (Value_Score - 1) × 0.3
-            
-            This ensures you can bid more aggressively on high-value players while maintaining budget discipline.
-            """)
-            
-        with metric_tabs[3]:
-            st.markdown("""
-            # Team Building Guidelines
-            
-            ## Team Composition Requirements
-            
-            - **Total Players**: 10 players per team
-            - **Gender Requirement**: Minimum 2 non-CIS (women) players
-            - **Budget**: ₹150M total
-            
-            ## Recommended Position Distribution
-            
-            - **Forwards**: 3 players (30-40% of budget)
-            - **Midfielders**: 3 players (25-35% of budget)
-            - **Defenders**: 3 players (15-25% of budget)
-            - **Goalkeeper**: 1 player (5-15% of budget)
-            
-            ## Tier Distribution Strategies
-            
-            ### Balanced Approach
-            - 1-2 Tier 1 players
-            - 2-3 Tier 2 players
-            - 3-4 Tier 3 players
-            - 2-3 Tier 4 players
-            
-            ### Star Power Approach
-            - 2-3 Tier 1 players
-            - 1-2 Tier 2 players
-            - 2-3 Tier 3 players
-            - 3-4 Tier 4 players
-            
-            ### Value Maximization Approach
-            - 0-1 Tier 1 players
-            - 3-4 Tier 2 players
-            - 4-5 Tier 3 players
-            - 1-2 Tier 4 players
-            
-            ## Budget Allocation Principles
-            
-            1. **Core vs. Support**: Allocate 60-70% to core players (4-5 players)
-            2. **Positional Weighting**: Premium on forwards and creative midfielders
-            3. **Value Targeting**: Prioritize players with Value Score > 1.5
-            4. **Reserve Flexibility**: Keep 5-10% in reserve for opportunities
-            """)
-            
-        with metric_tabs[4]:
-            st.markdown("""
-            # Glossary of Terms
-            
-            ## Player Categories
-            
-            - **Tier**: Fundamental skill classification (1-4, with 1 being highest)
-            - **Primary Position**: Player's main playing position
-            - **Secondary Position**: Alternative position capability
-            - **Gender**: Men or Women (minimum 2 women required per team)
-            
-            ## Value Metrics
-            
-            - **Value Score**: Measure of player's value relative to price (higher is better)
-            - **Auction Score**: Overall auction desirability on 0-10 scale
-            - **Auction Priority**: High/Medium/Low classification for auction targeting
-            
-            ## Price Components
-            
-            - **Price**: Listed auction price in millions (₹M)
-            - **Historical Average**: Average price from previous APL editions
-            - **Recommended Price**: Suggested maximum bid amount
-            - **Maximum Bid**: Dynamic calculation of highest justifiable bid based on team situation
-            
-            ## Strategic Terms
-            
-            - **Bidding Strategy**: Specific auction approach for each player
-            - **Selection Reason**: Justification for player's inclusion in top picks
-            - **Value Tier**: Classification based on Value Score (Excellent/Good/Fair/Poor)
-            - **Budget Fit**: How well a player fits within remaining team budget
-            """)
-
-# Add this function after the calculate_max_bid function
-def show_bid_modal(player_name, recommended_price=None, max_bid=None, current_budget=None):
-    """Display bid modal with slider for bid amount and input for final price"""
+        for metric_tab, section_md in zip(metric_tabs, INFO_SECTIONS_MD.values()):
+            with metric_tab:
+                st.markdown(section_md)
+
+# Function to get the bid slider's upper bound and starting bid
+def get_bid_bounds(recommended_price, max_bid, current_budget):
+    max_possible_bid = min(100.0, current_budget or 100.0)
+    initial_bid = recommended_price or max_bid or MIN_BID
+    return max_possible_bid, min(initial_bid, max_possible_bid)
+
+@st.fragment
+def show_bid_modal(player_name, pid, recommended_price=None, max_bid=None, current_budget=None, on_confirm=None, args=None, on_cancel=None):
+    """Display bid modal with slider for bid amount and input for final price.
+
+    A fragment, so submitting the form reruns only the modal; a confirmed or cancelled
+    bid then reruns the whole app once to update the team and budget everywhere.
+    """
     # Show budget and recommendation
     st.subheader(f"Place Bid for {player_name}")
     
@@ -2300,42 +2377,41 @@ def show_bid_modal(player_name, recommended_price=None, max_bid=None, current_bu
         st.write(f"Recommended Price: ₹{recommended_price}M")
     
     if max_bid:
-        st.write(f"Maximum Bid: ₹{max_bid}M")
+        st.write(f"Maximum Bid: ₹{max_bid:.1f}M")
     
     # Bid slider
-    min_bid = 0.5
-    max_possible_bid = min(100.0, current_budget or 100.0) 
-    
-    # Initialize bid amount
-    initial_bid = recommended_price or max_bid or min_bid
-    if initial_bid > max_possible_bid:
-        initial_bid = max_possible_bid
+    max_possible_bid, initial_bid = get_bid_bounds(recommended_price, max_bid, current_budget)
         
-    bid_amount = st.slider(
-        "Your Bid (₹M)", 
-        min_value=min_bid, 
-        max_value=max_possible_bid,
-        value=float(initial_bid),
-        step=0.5
-    )
-
-    # Final price input
-    final_price = st.number_input(
-        "Final Price Paid (₹M)",
-        min_value=0.0,
-        max_value=max_possible_bid,
-        value=bid_amount,
-        step=0.5
-    )
-    
-    # Buttons - without using columns
-    if st.button("Confirm and Add to Team", key=f"confirm_bid_{player_name}"):
-        return {"bid": bid_amount, "final_price": final_price, "action": "confirm"}
-    
-    if st.button("Cancel", key=f"cancel_bid_{player_name}"):
-        return {"action": "cancel"}
+    # Widgets inside a form don't rerun the app until the bid is confirmed or cancelled
+    with st.form(key=f"bid_form_{pid}", clear_on_submit=True):
+        bid_amount = st.slider(
+            "Your Bid (₹M)", 
+            min_value=MIN_BID, 
+            max_value=max_possible_bid,
+            value=float(initial_bid),
+            step=0.5,
+            key=f"bid_amount_{pid}"
+        )
+        
+        # Final price input
+        final_price = st.number_input(
+            "Final Price Paid (₹M)",
+            min_value=0.0,
+            max_value=max_possible_bid,
+            value=float(initial_bid),
+            step=0.5,
+            key=f"final_price_{pid}"
+        )
+        
+        # Buttons - without using columns
+        confirmed = st.form_submit_button("Confirm and Add to Team", on_click=on_confirm, args=args)
+        cancelled = st.form_submit_button("Cancel", on_click=on_cancel)
     
-    return {"action": "pending"}
+    # on_confirm keeps the modal open only when the player is unaffordable
+    if confirmed and st.session_state.current_bid_player == player_name:
+        st.error(f"Not enough budget to pay ₹{final_price}M for this player!")
+    elif confirmed or cancelled:
+        st.rerun()
 
 # Main function
 def main():
@@ -2346,19 +2422,25 @@ def main():
     auction_guide, top_picks, master_data = load_data()
     
     # Display header
-    tabs = show_header()
+    active_tab = show_header()
     
     # Display budget meter
     remaining_budget = st.session_state.remaining_budget
-    players_needed = TEAM_SIZE - len(st.session_state.team_players)
+    players_needed = st.session_state.players_needed
     show_budget(remaining_budget, players_needed)
     
-    # Display tabs
-    show_team_builder_tab(tabs[0], auction_guide)
-    show_player_search_tab(auction_guide, tabs[1])
-    show_top_targets_tab(top_picks, tabs[2])
-    show_simulation_tab(auction_guide, tabs[3])
-    show_info_tab(tabs[4])
+    # Display the active tab only
+    tab = st.container()
+    if active_tab == "Team Builder":
+        show_team_builder_tab(tab, auction_guide)
+    elif active_tab == "Player Search":
+        show_player_search_tab(auction_guide, tab)
+    elif active_tab == "Top Targets":
+        show_top_targets_tab(top_picks, tab)
+    elif active_tab == "Auction Simulation":
+        show_simulation_tab(auction_guide, tab)
+    else:
+        show_info_tab(tab)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file